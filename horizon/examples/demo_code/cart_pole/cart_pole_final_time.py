@@ -1,14 +1,11 @@
 #!/usr/bin/env python3
 
-from casadi_kin_dyn import pycasadi_kin_dyn
 from horizon.transcriptions.transcriptor import Transcriptor
 import casadi as cs
 import numpy as np
 from horizon import problem
 from horizon.utils import utils
-from horizon.transcriptions import integrators
 from horizon.solvers import solver
-import matplotlib.pyplot as plt
 import os
 
 # get path to the examples folder
@@ -19,8 +16,7 @@ plot_sol = True
 
 # Create CasADi interface to Pinocchio
 urdffile = os.path.join(path_to_examples, 'urdf', 'cart_pole.urdf')
-urdf = open(urdffile, 'r').read()
-kindyn = pycasadi_kin_dyn.CasadiKinDyn(urdf)
+kindyn = utils.kindyn_from_urdf(urdffile)
 
 # Get dimension of pos and vel
 nq = kindyn.nq()
@@ -41,7 +37,8 @@ qdot = prb.createStateVariable("qdot", nv)
 
 # Create problem CONTROL variables: tau = [u, 0], embed under-actuation in control
 u = prb.createInputVariable("u", 1)
-tau = cs.vertcat(u, 0.)
+S = cs.DM(cs.Sparsity.triplet(2, 1, [0], [0]), 1.)  # sparse selector of the actuated joint
+tau = cs.mtimes(S, u)
 
 # Create final time variable so that the duration of the trajectory is included in the optimization problem
 tf = prb.createVariable("tf", 1)
@@ -55,11 +52,6 @@ x, xdot = utils.double_integrator(q, qdot, qddot) # xdot = [qdot, qddot]
 prb.setDynamics(xdot)
 prb.setDt(dt)
 
-# setting up a custom integrator for the multiple shooting constraint
-L = 0.5*cs.dot(qdot, qdot)  # Objective term
-dae = {'x': x, 'p': u, 'ode': xdot, 'quad': L}
-F_integrator = integrators.RK4(dae, opts=None, casadi_type=cs.SX)
-
 # ================== Set BOUNDS and INITIAL GUESS  ===============================
 # joint limits + initial pos
 q_min = [-0.5, -2.*np.pi]
@@ -76,11 +68,17 @@ tf_min = 1.
 tf_max = 10.
 tf_init = 3.
 
-# Set bounds
-q.setBounds(q_min, q_max)
-q.setBounds(q_init, q_init, nodes=0)
-qdot.setBounds(-qdot_lims, qdot_lims)
-qdot.setBounds(qdot_init, qdot_init, nodes=0)
+# Set bounds: limits on all the nodes, pinned to the initial state on the first node
+q_lb = np.tile(np.array(q_min)[:, None], ns + 1)
+q_ub = np.tile(np.array(q_max)[:, None], ns + 1)
+q_lb[:, 0] = q_ub[:, 0] = q_init
+q.setBounds(q_lb, q_ub)
+
+qdot_lb = np.tile(-qdot_lims[:, None], ns + 1)
+qdot_ub = np.tile(qdot_lims[:, None], ns + 1)
+qdot_lb[:, 0] = qdot_ub[:, 0] = qdot_init
+qdot.setBounds(qdot_lb, qdot_ub)
+
 u.setBounds(-tau_lims, tau_lims)
 tf.setBounds(tf_min, tf_max)
 
@@ -89,14 +87,11 @@ q.setInitialGuess(q_init)
 qdot.setInitialGuess(qdot_init)
 tf.setInitialGuess(tf_init)
 
-# ====================== Set CONSTRAINTS ===============================
-q_prev = q.getVarOffset(-1)
-qdot_prev = qdot.getVarOffset(-1)
-u_prev = u.getVarOffset(-1)
-x_prev, _ = utils.double_integrator(q_prev, qdot_prev, fd(q=q_prev, v=qdot_prev, tau=cs.vertcat(u_prev, 0.))['a'])
-x_int = F_integrator(x0=x_prev, p=u_prev, time=dt)
-prb.createConstraint("multiple_shooting", x_int["xf"] - x, nodes=list(range(1, ns+1)), bounds=dict(lb=np.zeros(nv+nq), ub=np.zeros(nv+nq)))
+# ================== Set TRANSCRIPTION METHOD ===============================
+# direct collocation accepts a dt depending on the final time variable
+th = Transcriptor.make_method('direct_collocation', prb, opts=dict(degree=3))
 
+# ====================== Set CONSTRAINTS ===============================
 prb.createFinalConstraint("up", q[1] - np.pi)
 prb.createFinalConstraint("final_qdot", qdot)
 
@@ -110,8 +105,11 @@ prb.createCost("min_tf", 1000.*cs.sumsqr(tf))
 # ==================== BUILD PROBLEM ===============================
 # the solver class accept different solvers, such as 'ipopt', 'ilqr', 'gnsqp'.
 # Different solver are useful (and feasible) in different situations.
-
-solv = solver.Solver.make_solver('ipopt', prb, opts=None)
+# the problem functions are jit-compiled to native code, which speeds up each ipopt iteration
+solver_opts = {'jit': True,
+               'compiler': 'shell',
+               'jit_options': {'flags': ['-O3', '-march=native']}}
+solv = solver.Solver.make_solver('ipopt', prb, opts=solver_opts)
 
 # ==================== SOLVE PROBLEM ===============================
 solv.solve()
@@ -128,10 +126,12 @@ tf_sol = solution["tf"]
 print(f'Tf: {solution["tf"].flatten()}')
 
 if plot_sol:
+    import matplotlib.pyplot as plt
+
     # Horizon expose a plotter to simplify the generation of graphs
     # Once instantiated, variables and constraints can be plotted with ease
 
-    time = np.arange(0.0, solution["tf"] + 1e-6, solution["tf"] / ns)
+    time = np.linspace(0.0, float(tf_sol[0, 0]), ns + 1)
     plt.figure()
     plt.plot(time, solution["q"][0,:])
     plt.plot(time, solution["q"][1,:])
@@ -135,7 +135,7 @@ solver.solve()
 
 solution = solver.getSolutionDict()
 
-time = np.arange(0.0, tf + 1e-6, tf / ns)
+time = np.linspace(0.0, tf, ns + 1)
 plt.figure()
 plt.plot(time, solution['q'][0, :])
 plt.plot(time, solution['q'][1, :])
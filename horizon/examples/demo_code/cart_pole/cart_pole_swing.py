@@ -8,11 +8,9 @@ An example of the cart-pole problem: find the trajectory of the cart so that the
 import casadi as cs
 import numpy as np
 from horizon import problem
-from horizon.utils import utils, kin_dyn, mat_storer, plotter
+from horizon.utils import utils, kin_dyn, mat_storer
 from horizon.transcriptions.transcriptor import Transcriptor
 from horizon.solvers import solver
-from casadi_kin_dyn import pycasadi_kin_dyn as cas_kin_dyn
-import matplotlib.pyplot as plt
 import os
 
 # get path to the examples folder
@@ -23,8 +21,7 @@ plot_sol = True
 
 # Create CasADi interface to Pinocchio
 urdffile = os.path.join(path_to_examples, 'urdf', 'cart_pole.urdf')
-urdf = open(urdffile, 'r').read()
-kindyn = cas_kin_dyn.CasadiKinDyn(urdf)
+kindyn = utils.kindyn_from_urdf(urdffile)
 
 # Get dimension of pos and vel
 nq = kindyn.nq()
@@ -71,11 +68,17 @@ qdot_init = [0., 0.]
 qddot_lims = np.array([1000., 1000.])
 qddot_init = [0., 0.]
 
-# Set bounds
-q.setBounds(q_min, q_max)
-q.setBounds(q_init, q_init, nodes=0)
-qdot.setBounds(-qdot_lims, qdot_lims)
-qdot.setBounds(qdot_init, qdot_init, nodes=0)
+# Set bounds: limits on all the nodes, pinned to the initial state on the first node
+q_lb = np.tile(np.array(q_min)[:, None], ns + 1)
+q_ub = np.tile(np.array(q_max)[:, None], ns + 1)
+q_lb[:, 0] = q_ub[:, 0] = q_init
+q.setBounds(q_lb, q_ub)
+
+qdot_lb = np.tile(-qdot_lims[:, None], ns + 1)
+qdot_ub = np.tile(qdot_lims[:, None], ns + 1)
+qdot_lb[:, 0] = qdot_ub[:, 0] = qdot_init
+qdot.setBounds(qdot_lb, qdot_ub)
+
 qddot.setBounds(-qddot_lims, qddot_lims)
 
 # Set initial guess
@@ -108,7 +111,13 @@ prb.createIntermediateCost("qddot", cs.sumsqr(qddot))
 # ==================== BUILD PROBLEM ===============================
 # the solver class accept different solvers, such as 'ipopt', 'ilqr', 'gnsqp'.
 # Different solver are useful (and feasible) in different situations.
-solv = solver.Solver.make_solver('ipopt', prb, opts={'ipopt.tol': 1e-4,'ipopt.max_iter': 2000})
+# the problem functions are jit-compiled to native code, which speeds up each ipopt iteration
+solver_opts = {'ipopt.tol': 1e-4,
+               'ipopt.max_iter': 2000,
+               'jit': True,
+               'compiler': 'shell',
+               'jit_options': {'flags': ['-O3', '-march=native']}}
+solv = solver.Solver.make_solver('ipopt', prb, opts=solver_opts)
 
 # ==================== SOLVE PROBLEM ===============================
 solv.solve()
@@ -120,10 +129,13 @@ dt_sol = solv.getDt()
 # ====================== PLOT SOLUTION =======================
 
 if plot_sol:
+    import matplotlib.pyplot as plt
+    from horizon.utils import plotter
+
     # Horizon expose a plotter to simplify the generation of graphs
     # Once instantiated, variables and constraints can be plotted with ease
 
-    time = np.arange(0.0, tf+1e-6, tf/ns)
+    time = np.linspace(0.0, tf, ns + 1)
     plt.figure()
     plt.plot(time, solution['q'][0,:])
     plt.plot(time, solution['q'][1,:])
@@ -239,8 +239,11 @@ def set_gait_pattern(steps: List[Step], k0: float):
                     ub=np.full(n_f, np.inf))
 
     # reset contact indices for all legs
-    contact_nodes = [list(range(1, n_nodes + 1)) for _ in range(n_c)]
-    unilat_nodes = [list(range(n_nodes)) for _ in range(n_c)]
+    # one row of active nodes per leg: swing phases are cleared with a slice
+    contact_nodes = np.ones((n_c, n_nodes + 1), dtype=bool)
+    contact_nodes[:, 0] = False
+    unilat_nodes = np.ones((n_c, n_nodes + 1), dtype=bool)
+    unilat_nodes[:, n_nodes] = False
     clea_nodes = [list() for _ in range(n_c)]
     contact_k = [list() for _ in range(n_c)]
 
@@ -249,7 +252,7 @@ def set_gait_pattern(steps: List[Step], k0: float):
         l = s.leg
         k_start = s.k_start - k0
         k_goal = s.k_goal - k0
-        swing_nodes = list(range(k_start, k_goal))
+        swing_nodes = range(k_start, k_goal)
         swing_nodes_in_horizon_x = [k for k in swing_nodes if k >= 0 and k <= n_nodes]
         swing_nodes_in_horizon_u = [k for k in swing_nodes if k >= 0 and k < n_nodes]
         n_swing = len(swing_nodes)
@@ -259,14 +262,14 @@ def set_gait_pattern(steps: List[Step], k0: float):
             continue
 
         # update nodes contact constraint
-        contact_nodes[l] = [k for k in contact_nodes[l] if k not in swing_nodes]
+        contact_nodes[l, max(k_start, 0):max(k_goal, 0)] = False
 
         # contact instants
         if k_goal <= n_nodes and k_goal > 0:
             contact_k[l].append(k_goal)
 
         # update nodes for unilateral constraint
-        unilat_nodes[l] = [k for k in unilat_nodes[l] if k not in swing_nodes]
+        unilat_nodes[l, max(k_start, 0):max(k_goal, 0)] = False
 
         # update zero force constraints
         fzero = np.zeros(n_f)
@@ -276,15 +279,16 @@ def set_gait_pattern(steps: List[Step], k0: float):
         # for all swing nodes + first stance node
         k_trj = swing_nodes_in_horizon_x[:]
         # k_trj = [k for k in k_trj if k <= n_nodes]
-        for k in k_trj:
-            tau = (k - k_start) / n_swing
-            zdes_params[l].assign(z_trj(tau) * 0.10, nodes=k)
+        # assign the whole swing trajectory at once, one column per node
+        if k_trj:
+            tau = (np.array(k_trj) - k_start) / n_swing
+            zdes_params[l].assign(np.atleast_2d(z_trj(tau) * 0.10), nodes=k_trj)
 
         clea_nodes[l].extend(k_trj)
 
     for i in range(n_c):
-        contact_constr[i].setNodes(contact_nodes[i], erasing=True)
-        unilat_constr[i].setNodes(unilat_nodes[i], erasing=True)
+        contact_constr[i].setNodes(np.flatnonzero(contact_nodes[i]).tolist(), erasing=True)
+        unilat_constr[i].setNodes(np.flatnonzero(unilat_nodes[i]).tolist(), erasing=True)
         clea_constr[i].setNodes(clea_nodes[i], erasing=True)
         contact_y[i].setNodes(contact_k[i], erasing=True)
 
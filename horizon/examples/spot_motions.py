@@ -180,7 +180,7 @@ def main(args):
     q_final[3:7] = disp[3:7]
 
     def barrier(x):
-        return cs.sum1(cs.if_else(x > 0, 0, x ** 2))
+        return cs.sum1((x <= 0) * x ** 2)
 
     for frame, f in contact_map.items():
         nodes_stance = k_stance if frame in lifted_legs else k_all
@@ -53,7 +53,8 @@ obs_cnsrt.setUpperBounds(np.inf)
 prob.createIntermediateCost('cost', cs.sumsqr(F))
 
 # solve
-solver = solver.Solver.make_solver('ipopt', prob)
+# expand the MX nlp graph to SX before building the solver
+solver = solver.Solver.make_solver('ipopt', prob, opts={'expand': True})
 solver.solve()
 solution = solver.getSolutionDict()
 
@@ -29,6 +29,11 @@ def getRanges(i):
         b = list(b)
         yield b[0][1], b[-1][1]
 
+def _ioName(var):
+    # an offset variable shares the name of its parent: the offset keeps the input names unique
+    return f'{var.getName()}{var.getOffset():+d}' if var.getOffset() else var.getName()
+
+
 class AbstractFunction:
     """
         Function of Horizon: generic function of SX values from CASADI.
@@ -59,7 +64,7 @@ class AbstractFunction:
 
         # create function of CASADI, dependent on (in order) [all_vars, all_pars]
         all_input = self.vars + self.pars
-        all_names = [i.getName() for i in all_input]
+        all_names = [_ioName(i) for i in all_input]
 
         self._fun = cs.Function(name, self.vars + self.pars, [self._f], all_names, ['f'])
 
@@ -813,7 +818,7 @@ class RecedingCost(RecedingFunction):
         # override _f and _fun
         self._f = self.weight_mask * self._f
         all_input = self.vars + self.pars
-        all_names = [i.getName() for i in all_input]
+        all_names = [_ioName(i) for i in all_input]
         self._fun = cs.Function(self.getName(), self.vars + self.pars, [self._f], all_names, ['f'])
 
     def _getWeightMask(self):
@@ -205,7 +205,8 @@ class HorizonWpg:
 
         self.q.setInitialGuess(q0)
 
-        (f.setInitialGuess(f0) for f in self.forces)
+        for f in self.forces:
+            f.setInitialGuess(f0)
 
         # set initial gait pattern
         self._set_gait_pattern(k0=0)
@@ -103,7 +103,7 @@ class HorizonWpg:
 
         q0 = self.ti.q0
         v0 = self.ti.v0
-        f0 = np.array([0, 0, 250])
+        f0 = np.array([0., 0., 250.])
 
         # final velocity
         self.ti.model.v.setBounds(v0, v0, nodes=self.N)
@@ -183,14 +183,13 @@ class HorizonWpg:
         # contact velocity is zero, and normal force is positive
         for i, frame in enumerate(self.ti.model.contacts):
             # fk functions and evaluated vars
-            fk = cs.Function.deserialize(self.ti.kd.fk(frame))
-            dfk = cs.Function.deserialize(self.ti.kd.frameVelocity(frame, self.ti.kd_frame))
+            fk = kin_dyn.fk_function(self.ti.kd, frame)
             self.fk_fn.append(fk)
 
             ee_rot = fk(q=self.ti.model.q)['ee_rot']
 
             # save foot height
-            self.default_foot_z[frame] = fk(q=q0)['ee_pos'][2]
+            self.default_foot_z[frame] = float(fk(q=q0)['ee_pos'][2])
 
             # vertical contact frame
             rot_err = cs.sumsqr(ee_rot[2, :2])
@@ -279,7 +278,8 @@ class HorizonWpg:
 
         self.ti.model.q.setInitialGuess(q0)
 
-        (f.setInitialGuess(f0) for f in self.forces)
+        for f in self.forces:
+            f.setInitialGuess(f0)
 
         # set initial gait pattern
         self._set_gait_pattern(k0=0)
@@ -521,7 +521,8 @@ class HorizonWpg:
 
         # reset contact indices for all legs
 
-        contact_nodes = {key: list(range(self.N + 1)) for key in self.contacts}
+        # active nodes as a mask per contact: swing phases are cleared with a slice
+        contact_nodes = {key: np.ones(self.N + 1, dtype=bool) for key in self.contacts}
         # unilat_nodes = [list(range(self.N)) for _ in range(self.nc)]
         clea_nodes = {key: [] for key in self.contacts}
         contact_k = {key: [] for key in self.contacts}
@@ -535,8 +536,8 @@ class HorizonWpg:
             frame = s.frame
             k_start = s.k_start - k0
             k_goal = s.k_goal - k0
-            swing_nodes = list(range(k_start, k_goal))
-            swing_nodes_in_horizon_x = [k for k in swing_nodes if k >= 0 and k <= self.N]
+            swing_nodes = range(k_start, k_goal)
+            swing_nodes_in_horizon_x = list(range(max(k_start, 0), min(k_goal, self.N + 1)))
             n_swing = len(swing_nodes)
 
             # this step is outside the horizon!
@@ -544,7 +545,9 @@ class HorizonWpg:
                 continue
 
             # update nodes contact constraint
-            contact_nodes[frame] = [k for k in contact_nodes[frame] if k not in swing_nodes and k < self.N]
+            # a contact with a step in the horizon is never active on the last node
+            contact_nodes[frame][max(k_start, 0):max(k_goal, 0)] = False
+            contact_nodes[frame][self.N] = False
 
             # update nodes for unilateral constraint
             # unilat_nodes[l] = [k for k in unilat_nodes[l] if k not in swing_nodes]
@@ -558,16 +561,10 @@ class HorizonWpg:
             k_trj = swing_nodes_in_horizon_x[:]
 
             # compute swing trj
-            z_temp = np.zeros((1, len(k_trj)))
-            k_elem = 0
-            for k in k_trj:
-                tau = (k - k_start) / n_swing
-                z_start = self.default_foot_z[frame] if s.start.size == 0 else s.start[2]
-                z_goal = self.default_foot_z[frame] if s.goal.size == 0 else s.goal[2]
-                zk = HorizonWpg._z_trj(tau) * s.clearance
-                zk += (1 - tau) * z_start + tau * z_goal
-                z_temp[:, k_elem] = zk
-                k_elem += 1
+            z_start = self.default_foot_z[frame] if s.start.size == 0 else float(s.start[2])
+            z_goal = self.default_foot_z[frame] if s.goal.size == 0 else float(s.goal[2])
+            tau = (np.array(k_trj) - k_start) / n_swing
+            z_temp = np.atleast_2d(HorizonWpg._z_trj(tau) * s.clearance + (1 - tau) * z_start + tau * z_goal)
 
             if z_ref[frame] is None:
                 z_ref[frame] = z_temp
@@ -595,7 +592,7 @@ class HorizonWpg:
         # update contact nodes
 
         for frame in self.contacts:
-            self.ti.getTask(f'contact_{frame}').setNodes(contact_nodes[frame])
+            self.ti.getTask(f'contact_{frame}').setNodes(np.flatnonzero(contact_nodes[frame]).tolist())
             self.ti.getTask(f'{frame}_z_task').setRef(z_ref[frame])
             self.ti.getTask(f'{frame}_z_task').setNodes(clea_nodes[frame])
             self.ti.getTask(f'{frame}_foot_tgt_constr').setRef(np.array((xy_ref[frame])))
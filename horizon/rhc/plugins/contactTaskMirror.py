@@ -2,7 +2,6 @@ import casadi as cs
 import numpy as np
 from horizon.rhc.tasks.cartesianTask import CartesianTask
 from horizon.rhc.tasks.interactionTask import InteractionTask
-from horizon.functions import RecedingConstraint, RecedingCost
 from horizon.utils.utils import barrier as barrier_fun
 from horizon.rhc.tasks.task import Task
 
@@ -39,6 +38,9 @@ class ContactTaskMirror(Task):
         self.constraints.append(self._unil_constr)
         self.constraints.append(self._friction_constr)
         self.constraints.append(self._vertical_takeoff_consrt)
+
+        # split by type once, where they are created: _reset() relaxes them on all the nodes
+        self._receding_constr, self._receding_cost = self._split_receding(self.constraints)
         # ===========================================
 
         self.actions = []
@@ -49,14 +51,15 @@ class ContactTaskMirror(Task):
         self.nodes = nodes
         self._reset()
 
-        all_nodes = list(range(self.prb.getNNodes()))
+        n_nodes = self.prb.getNNodes()
+        active_nodes = np.array(self.nodes, dtype=int)
 
         # if it's on:
-        nodes_on_x = [k for k in self.nodes if k <= self.prb.getNNodes() - 1]
-        nodes_on_u = [k for k in self.nodes if k < self.prb.getNNodes() - 1]
+        nodes_on_x = active_nodes[active_nodes <= n_nodes - 1].tolist()
+        nodes_on_u = active_nodes[active_nodes < n_nodes - 1].tolist()
 
-        nodes_off_x = [k for k in all_nodes if k not in nodes_on_x]
-        nodes_off_u = [k for k in all_nodes if k not in nodes_on_u and k < self.prb.getNNodes() - 1]
+        nodes_off_x = np.setdiff1d(np.arange(n_nodes), nodes_on_x).tolist()
+        nodes_off_u = np.setdiff1d(np.arange(n_nodes - 1), nodes_on_u).tolist()
 
         # todo F=0 and v=0 must be activated on the same node otherwise there is one interval where F!=0 and v!=0
 
@@ -72,14 +75,14 @@ class ContactTaskMirror(Task):
             self._vertical_takeoff_nodes.extend(nodes_ver)
             self._vertical_takeoff_consrt.setNodes(self._vertical_takeoff_nodes, erasing=erasing)
 
-
-        print(f'contact {self.name} nodes:')
-        print(f'zero_velocity: {self._zero_vel_constr.getNodes()}')
-        print(f'unilaterality: {self._unil_constr.getNodes().tolist()}')
-        print(f'force: ')
-        print(f'{np.where(self.force.getLowerBounds()[0, :] == 0.)[0].tolist()}')
-        print(f'{np.where(self.force.getUpperBounds()[0, :] == 0.)[0].tolist()}')
-        print('===================================')
+        if self.prb.debug_mode:
+            self.prb.logger.debug('contact %s nodes:', self.name)
+            self.prb.logger.debug('zero_velocity: %s', self._zero_vel_constr.getNodes())
+            self.prb.logger.debug('unilaterality: %s', self._unil_constr.getNodes())
+            self.prb.logger.debug('force: ')
+            self.prb.logger.debug('%s', np.where(self.force.getLowerBounds()[0, :] == 0.)[0])
+            self.prb.logger.debug('%s', np.where(self.force.getUpperBounds()[0, :] == 0.)[0])
+            self.prb.logger.debug('===================================')
 
     # def _zero_velocity(self, nodes=None):
     #     """
@@ -133,18 +136,7 @@ class ContactTaskMirror(Task):
         nodes = list(range(self.prb.getNNodes()))
         # todo reset task
         # task.reset()
-        for fun in self.constraints:
-            ## constraints and variables --> relax bounds
-            if isinstance(fun, RecedingConstraint):
-                ## constraints and variables --> relax bounds
-                c_inf = np.inf * np.ones(fun.getDim())
-                fun.setBounds(-c_inf, c_inf, nodes)
-            elif isinstance(fun, RecedingCost):
-                current_nodes = fun.getNodes().astype(int)
-                new_nodes = current_nodes.copy()
-                for val in nodes:
-                    new_nodes = new_nodes[new_nodes != val]
-                fun.setNodes(new_nodes, erasing=True)
+        self._relax(self._receding_constr, self._receding_cost, nodes)
 
         self.force.setBounds(lb=np.full(self.force.getDim(), -np.inf),
                              ub=np.full(self.force.getDim(), np.inf))
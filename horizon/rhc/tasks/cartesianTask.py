@@ -1,6 +1,7 @@
 from horizon.rhc.tasks.task import Task
 import casadi as cs
 from horizon.problem import Problem
+from horizon.utils.kin_dyn import fk_function, frame_velocity_function, frame_acceleration_function
 import numpy as np
 
 # todo name is useless
@@ -26,27 +27,30 @@ class CartesianTask(Task):
 
         # kd_frame = pycasadi_kin_dyn.CasadiKinDyn.LOCAL_WORLD_ALIGNED
         if self.cartesian_type == 'position':
-            fk = cs.Function.deserialize(self.kin_dyn.fk(self.frame))
-            ee_p_t = fk(q=q)['ee_pos']
-            ee_p_r = fk(q=q)['ee_rot']
+            fk = fk_function(self.kin_dyn, self.frame)
+            ee_p = fk(q=q)
+            ee_p_t = ee_p['ee_pos']
+            ee_p_r = ee_p['ee_rot']
             # ee_p = cs.vertcat(ee_p_t, ee_p_r)
 
             frame_name = f'{self.name}_{self.frame}_pos'
             self.pos_tgt = self.prb.createParameter(f'{frame_name}_tgt', self.indices.size)
             fun = ee_p_t[self.indices] - self.pos_tgt
         elif self.cartesian_type == 'velocity':
-            dfk = cs.Function.deserialize(self.kin_dyn.frameVelocity(self.frame, self.kd_frame))
-            ee_v_t = dfk(q=q, qdot=v)['ee_vel_linear']
-            ee_v_r = dfk(q=q, qdot=v)['ee_vel_angular']
+            dfk = frame_velocity_function(self.kin_dyn, self.frame, self.kd_frame)
+            ee_vel = dfk(q=q, qdot=v)
+            ee_v_t = ee_vel['ee_vel_linear']
+            ee_v_r = ee_vel['ee_vel_angular']
             ee_v = cs.vertcat(ee_v_t, ee_v_r)
 
             frame_name = f'{self.name}_{self.frame}_vel'
             self.vel_tgt = self.prb.createParameter(f'{frame_name}_tgt', self.indices.size)
             fun = ee_v[self.indices] - self.vel_tgt
         elif self.cartesian_type == 'acceleration':
-            ddfk = cs.Function.deserialize(self.kin_dyn.frameAcceleration(self.frame, self.kd_frame))
-            ee_a_t = ddfk(q=q, qdot=v)['ee_acc_linear']
-            ee_a_r = ddfk(q=q, qdot=v)['ee_acc_angular']
+            ddfk = frame_acceleration_function(self.kin_dyn, self.frame, self.kd_frame)
+            ee_acc = ddfk(q=q, qdot=v)
+            ee_a_t = ee_acc['ee_acc_linear']
+            ee_a_r = ee_acc['ee_acc_angular']
             ee_a = cs.vertcat(ee_a_t, ee_a_r)
             frame_name = f'{self.name}_{self.frame}_acc'
             self.acc_tgt = self.prb.createParameter(f'{frame_name}_tgt', self.indices.size)
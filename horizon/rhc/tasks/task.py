@@ -2,6 +2,7 @@ import casadi as cs
 from typing import List, Iterable, Union, Sequence
 import random, string
 from horizon.problem import Problem
+from horizon.functions import RecedingConstraint, RecedingCost
 import numpy as np
 from casadi_kin_dyn import pycasadi_kin_dyn
 from dataclasses import dataclass, field
@@ -46,6 +47,40 @@ class Task:
     def _reset(self):
         pass
 
+    @staticmethod
+    def _split_receding(functions):
+        """
+        Split the functions of a task by type, once, to be relaxed by _relax().
+
+        Args:
+            functions: functions of the task
+
+        Returns:
+            constraints: receding constraints among the functions
+            costs: receding costs among the functions
+        """
+        constraints = [fun for fun in functions if isinstance(fun, RecedingConstraint)]
+        costs = [fun for fun in functions if isinstance(fun, RecedingCost)]
+        return constraints, costs
+
+    def _relax(self, constraints, costs, nodes):
+        """
+        Relax the receding functions on the given nodes: constraints get infinite bounds, costs are removed from the nodes.
+
+        Args:
+            constraints: receding constraints of the task (see _split_receding())
+            costs: receding costs of the task (see _split_receding())
+            nodes: nodes to relax
+        """
+        ## constraints and variables --> relax bounds
+        for fun in constraints:
+            c_inf = np.full(fun.getDim(), np.inf)
+            fun.setBounds(-c_inf, c_inf, nodes)
+
+        for fun in costs:
+            current_nodes = fun.getNodes().astype(int)
+            fun.setNodes(current_nodes[~np.isin(current_nodes, nodes)], erasing=True)
+
     def getNodes(self):
         return self.nodes
 
@@ -8,5 +8,7 @@ class IpoptSolver(NlpsolSolver):
     def __init__(self, prb: Problem, opts: Dict) -> None:
         filtered_opts = None 
         if opts is not None:
-            filtered_opts = {k: opts[k] for k in opts.keys() if k.startswith('ipopt.')}
+            # nlpsol options expanding the problem to SX and compiling its functions (jit or cached) are forwarded as well
+            jit_opts = ('jit', 'compiler', 'jit_options', 'codegen_cache_dir', 'expand')
+            filtered_opts = {k: opts[k] for k in opts.keys() if k.startswith('ipopt.') or k in jit_opts}
         super().__init__(prb, opts=filtered_opts, solver_plugin='ipopt')
@@ -13,6 +13,9 @@ class NlpsolSolver(Solver):
 
         super().__init__(prb, opts=opts)
 
+        # if given, the compiled problem is cached in this folder and reused by later runs
+        self.codegen_cache_dir = self.opts.pop('codegen_cache_dir', None)
+
         # generate problem to be solved
         self.var_container = self.prb.var_container
         self.fun_container = self.prb.function_container
@@ -41,8 +44,34 @@ class NlpsolSolver(Solver):
 
         self.prob_dict = {'f': j, 'x': w, 'g': g, 'p': p}
 
+        # the transcription yields a block-banded constraint jacobian: a growing density flags a coupling introduced by mistake
+        if self.prb.debug_mode:
+            jac_sp = cs.jacobian_sparsity(g, w)
+            self.prb.logger.debug('Constraint jacobian: %dx%d, %d nonzeros (density: %.3f%%)', jac_sp.size1(), jac_sp.size2(), jac_sp.nnz(), jac_sp.density())
+
         # create solver from prob
-        self.solver = cs.nlpsol('solver', solver_plugin, self.prob_dict, self.opts)
+        if self.codegen_cache_dir is None:
+            self.solver = cs.nlpsol('solver', solver_plugin, self.prob_dict, self.opts)
+        else:
+            self.solver = cs.nlpsol('solver', solver_plugin, self._compileProblem(solver_plugin), self.opts)
+
+    def _compileProblem(self, solver_plugin: str) -> str:
+        """
+        generate and compile the problem functions to a shared library, named after the hash of the problem graph.
+        A structurally identical problem (e.g. the same mpc built again) loads the library without compiling it again.
+        """
+        from horizon.utils.utils import compile_functions
+
+        # the library is looked up by the problem graph and the solver options: the solver is built only on a miss
+        nlp = cs.Function('nlp', [self.prob_dict['x'], self.prob_dict['p']], [self.prob_dict['f'], self.prob_dict['g']])
+        key = '\n'.join([cs.__version__, solver_plugin, repr(sorted(self.opts.items())), nlp.serialize()])
+
+        def solver_functions():
+            # the oracle ('nlp') and the functions derived from it by the solver: the same code as generate_dependencies()
+            solver = cs.nlpsol('solver', solver_plugin, self.prob_dict, self.opts)
+            return [solver.oracle()] + [solver.get_function(name) for name in solver.get_function()]
+
+        return compile_functions('nlp', key, solver_functions, self.codegen_cache_dir)
 
     def build(self):
         """
@@ -0,0 +1,182 @@
+from horizon.problem import Problem
+import casadi as cs
+import numpy as np
+
+import unittest
+
+try:
+    from horizon.utils.actionManager import ActionManager, Step
+except ModuleNotFoundError:  # the action manager requires casadi_kin_dyn and rospy
+    ActionManager = None
+
+
+class RecordingTask:
+    # keeps the last nodes and reference set by the action manager
+    def __init__(self):
+        self.nodes = None
+        self.ref = None
+
+    def setNodes(self, nodes):
+        self.nodes = list(nodes)
+
+    def setRef(self, ref):
+        self.ref = np.array(ref)
+
+
+class FootKinDyn:
+    # forward kinematics placing each foot at a fixed height
+    def __init__(self, foot_z):
+        self.foot_z = foot_z
+
+    def fk(self, frame):
+        q = cs.SX.sym('q', 1)
+        return cs.Function('fk', [q], [cs.vertcat(0, 0, self.foot_z[frame]), cs.SX.eye(3)],
+                           ['q'], ['ee_pos', 'ee_rot']).serialize()
+
+
+class TaskInterface:
+    # the part of the task interface used by the action manager
+    def __init__(self, prb, foot_z):
+        self.prb = prb
+        self.model = type('Model', (), {'fmap': dict.fromkeys(foot_z)})
+        self.kd = FootKinDyn(foot_z)
+        self.q0 = np.zeros(1)
+        self.tasks = {f'{task}_{frame}': RecordingTask() for task in ['foot_contact', 'foot_z', 'foot_xy'] for frame in foot_z}
+
+    def getTask(self, name):
+        return self.tasks[name]
+
+    def getTasksType(self, task_type):
+        return task_type
+
+
+class Solution:
+    def __init__(self, prb):
+        self.x = np.zeros((prb.getState().getVars().shape[0], prb.getNNodes()))
+        self.u = np.zeros((prb.getInput().getVars().shape[0], prb.getNNodes() - 1))
+
+    def getSolutionState(self):
+        return self.x
+
+    def getSolutionInput(self):
+        return self.u
+
+
+def shift_guess_roll(values, shift_num):
+    # reference: the warm start shifted with np.roll, its last nodes overwritten one by one
+    shifted = np.roll(values, shift_num, axis=1)
+    for i in range(abs(shift_num)):
+        shifted[:, -1 - i] = values[:, -1]
+    return shifted
+
+
+def swing_z(k_start, k_goal, z_start, z_goal, clearance, nodes):
+    # reference: the swing height of the nodes of a step
+    tau = (np.asarray(nodes) - k_start) / (k_goal - k_start)
+    return z_start * (1 - tau) + z_goal * tau + 64. * tau ** 3 * (1 - tau) ** 3 * clearance
+
+
+@unittest.skipIf(ActionManager is None, 'casadi_kin_dyn or rospy not available')
+class TestActionManager(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.N = 20
+        self.foot_z = {'lf_foot': -0.50, 'rf_foot': -0.51, 'lh_foot': -0.52, 'rh_foot': -0.53}
+
+        prb = Problem(self.N, receding=True)
+        prb.createStateVariable('x', 2)
+        prb.createInputVariable('u', 1)
+
+        self.ti = TaskInterface(prb, self.foot_z)
+        self.am = ActionManager(self.ti)
+
+    def assertFootNodes(self, frame, contact_nodes, z_nodes, xy_nodes=()):
+        self.assertEqual(self.ti.getTask(f'foot_contact_{frame}').nodes, list(contact_nodes))
+        self.assertEqual(self.ti.getTask(f'foot_z_{frame}').nodes, list(z_nodes))
+        self.assertEqual(self.ti.getTask(f'foot_xy_{frame}').nodes, list(xy_nodes))
+
+    def assertFootZ(self, frame, z_ref):
+        np.testing.assert_allclose(self.ti.getTask(f'foot_z_{frame}').ref, np.atleast_2d(z_ref), rtol=0., atol=1e-12)
+
+    def test_walk(self):
+
+        self.am._walk([2, 18])
+        self.am.setStep(Step('rh_foot', 15, 19, goal=np.array([0.3, -0.2, -0.45])))
+
+        all_nodes = set(range(self.N + 1))
+        self.assertFootNodes('lf_foot', sorted(all_nodes - set(range(2, 7))), range(2, 7))
+        self.assertFootNodes('rf_foot', sorted(all_nodes - set(range(7, 12))), range(7, 12))
+        self.assertFootNodes('lh_foot', sorted(all_nodes - set(range(12, 17))), range(12, 17))
+        self.assertFootNodes('rh_foot', sorted(all_nodes - set(range(15, 19))), range(15, 19), [19])
+
+        self.assertFootZ('lf_foot', swing_z(2, 7, -0.50, -0.50, 0.08, range(2, 7)))
+        self.assertFootZ('rf_foot', swing_z(7, 12, -0.51, -0.51, 0.08, range(7, 12)))
+        self.assertFootZ('lh_foot', swing_z(12, 17, -0.52, -0.52, 0.08, range(12, 17)))
+        self.assertFootZ('rh_foot', swing_z(15, 19, -0.53, -0.45, 0.08, range(15, 19)))
+        np.testing.assert_array_equal(self.ti.getTask('foot_xy_rh_foot').ref, [[0.3], [-0.2]])
+
+        # receding: every step moves back by one node
+        self.am.execute(Solution(self.ti.prb))
+
+        self.assertFootNodes('lf_foot', sorted(all_nodes - set(range(1, 6))), range(1, 6))
+        self.assertFootNodes('rh_foot', sorted(all_nodes - set(range(14, 18))), range(14, 18), [18])
+        self.assertFootZ('lf_foot', swing_z(1, 6, -0.50, -0.50, 0.08, range(1, 6)))
+        self.assertFootZ('rh_foot', swing_z(14, 18, -0.53, -0.45, 0.08, range(14, 18)))
+        np.testing.assert_array_equal(self.ti.getTask('foot_xy_rh_foot').ref, [[0.3], [-0.2]])
+
+    def test_trot(self):
+
+        self.am._trot([1, 11])
+
+        all_nodes = set(range(self.N + 1))
+        for frame in ['lf_foot', 'rh_foot']:
+            self.assertFootNodes(frame, sorted(all_nodes - set(range(1, 6))), range(1, 6))
+            self.assertFootZ(frame, swing_z(1, 6, self.foot_z[frame], self.foot_z[frame], 0.03, range(1, 6)))
+        for frame in ['lh_foot', 'rf_foot']:
+            self.assertFootNodes(frame, sorted(all_nodes - set(range(6, 11))), range(6, 11))
+            self.assertFootZ(frame, swing_z(6, 11, self.foot_z[frame], self.foot_z[frame], 0.03, range(6, 11)))
+
+        # receding: the first steps leave the horizon, the trajectory of their nodes left is kept
+        solution = Solution(self.ti.prb)
+        for _ in range(3):
+            self.am.execute(solution)
+
+        for frame in ['lf_foot', 'rh_foot']:
+            self.assertFootNodes(frame, sorted(all_nodes - set(range(0, 3))), range(0, 3))
+            self.assertFootZ(frame, swing_z(-2, 3, self.foot_z[frame], self.foot_z[frame], 0.03, range(0, 3)))
+        for frame in ['lh_foot', 'rf_foot']:
+            self.assertFootNodes(frame, sorted(all_nodes - set(range(3, 8))), range(3, 8))
+            self.assertFootZ(frame, swing_z(3, 8, self.foot_z[frame], self.foot_z[frame], 0.03, range(3, 8)))
+
+        # after five more shifts the first pair of steps has expired
+        for _ in range(5):
+            self.am.execute(solution)
+
+        for frame in ['lf_foot', 'rh_foot']:
+            self.assertFootNodes(frame, range(self.N + 1), [])
+        for frame in ['lh_foot', 'rf_foot']:
+            self.assertFootNodes(frame, sorted(all_nodes - set(range(0, 3))), range(0, 3))
+            self.assertFootZ(frame, swing_z(-2, 3, self.foot_z[frame], self.foot_z[frame], 0.03, range(0, 3)))
+        self.assertEqual(len(self.am.action_list), 2)
+
+    def test_edited_step(self):
+
+        step = Step('lf_foot', 2, 7)
+        self.am.setStep(step)
+        self.assertEqual(vars(step).keys(), vars(Step('lf_foot', 2, 7)).keys())
+
+        # the new clearance is used from the next iteration
+        step.clearance = 0.2
+        self.am.execute(Solution(self.ti.prb))
+        self.assertFootZ('lf_foot', swing_z(1, 6, -0.50, -0.50, 0.2, range(1, 6)))
+
+    def test_shift_guess(self):
+
+        values = np.random.default_rng(0).normal(size=(3, 10))
+        for shift_num in range(-3, 4):
+            with self.subTest(shift_num=shift_num):
+                np.testing.assert_array_equal(ActionManager._shift_guess(values, shift_num), shift_guess_roll(values, shift_num))
+
+
+if __name__ == '__main__':
+    unittest.main()
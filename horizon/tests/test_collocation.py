@@ -0,0 +1,139 @@
+from horizon.problem import Problem
+from horizon.solvers import Solver
+from horizon.transcriptions.transcriptor import Transcriptor
+from horizon.transcriptions.methods import _collocation_coefficients
+import casadi as cs
+import numpy as np
+
+import unittest
+
+
+def lagrange_coefficients(d, scheme):
+    # reference: the coefficients built one Lagrange polynomial at a time with np.poly1d
+    tau_root = np.append(0, cs.collocation_points(d, scheme))
+
+    C = np.zeros((d + 1, d + 1))
+    D = np.zeros(d + 1)
+    B = np.zeros(d + 1)
+
+    for j in range(d + 1):
+        p = np.poly1d([1])
+        for r in range(d + 1):
+            if r != j:
+                p *= np.poly1d([1, -tau_root[r]]) / (tau_root[j] - tau_root[r])
+
+        D[j] = p(1.0)
+
+        pder = np.polyder(p)
+        for r in range(d + 1):
+            C[r, j] = pder(tau_root[r])
+
+        pint = np.polyint(p)
+        B[j] = pint(1.0)
+
+    return C, D, B
+
+
+def point_mass_problem(nodes=20, dt=0.1):
+    # point mass pushed from rest at the origin to rest at [1, 1]
+    prb = Problem(nodes)
+    p = prb.createStateVariable('pos', dim=2)
+    v = prb.createStateVariable('vel', dim=2)
+    f = prb.createInputVariable('force', dim=2)
+
+    prb.setDynamics(cs.vertcat(v, f))
+    prb.setDt(dt)
+
+    p.setBounds(lb=[0, 0], ub=[0, 0], nodes=0)
+    v.setBounds(lb=[0, 0], ub=[0, 0], nodes=0)
+    v.setBounds(lb=[0, 0], ub=[0, 0], nodes=nodes)
+
+    prb.createIntermediateResidual('cost', f)
+    prb.createFinalConstraint('final_pos', p - [1, 1])
+
+    return prb
+
+
+def per_point_collocation(prb, d):
+    # reference: direct collocation with one dynamics constraint 'collo_dyn_{i}' per collocation point
+    dt = prb.getDt()
+    N = prb.getNNodes() - 1
+
+    xdot = prb.getDynamics()
+    x = prb.getState().getVars()
+    x_prev = prb.getState().getVarOffset(-1).getVars()
+
+    collo = [prb.createInputVariable(f'collo_x_{i}', dim=x.shape[0]) for i in range(d)]
+    collo_prev = [var.getVarOffset(-1) for var in collo]
+    collo.insert(0, x)
+    collo_prev.insert(0, x_prev)
+
+    C, D, B = lagrange_coefficients(d, 'legendre')
+
+    x_prev_int = 0
+    for i in range(d + 1):
+        x_prev_int += collo_prev[i] * D[i]
+
+    prb.createConstraint('collo_continuity', x_prev_int - x, nodes=range(1, N + 1))
+
+    for i in range(d):
+        xder = 0
+        for j in range(d + 1):
+            xder += C[i + 1, j] * collo[j]
+        prb.createConstraint(f'collo_dyn_{i}', xder - xdot * dt, nodes=range(N))
+
+
+class TestCollocationCoefficients(unittest.TestCase):
+
+    def test_lagrange_basis(self):
+
+        for scheme in ['legendre', 'radau']:
+            for d in range(1, 6):
+                with self.subTest(scheme=scheme, degree=d):
+                    C, D, B = _collocation_coefficients(d, scheme)
+                    C_ref, D_ref, B_ref = lagrange_coefficients(d, scheme)
+
+                    self.assertEqual(C.shape, (d + 1, d + 1))
+                    self.assertEqual(D.shape, (d + 1,))
+                    self.assertEqual(B.shape, (d + 1,))
+                    np.testing.assert_allclose(C, C_ref, rtol=1e-9, atol=1e-9)
+                    np.testing.assert_allclose(D, D_ref, rtol=1e-9, atol=1e-9)
+                    np.testing.assert_allclose(B, B_ref, rtol=1e-9, atol=1e-9)
+
+
+class TestDirectCollocation(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.degree = 3
+        self.opts = {'ipopt.print_level': 0}
+
+    def test_stacked_dynamics(self):
+        # the dynamics of all the collocation points are a single constraint, stacked point by point
+        prb = point_mass_problem()
+        Transcriptor.make_method('direct_collocation', prb, opts=dict(degree=self.degree))
+
+        cnsrts = prb.getConstraints()
+        self.assertIn('collo_dyn', cnsrts)
+        self.assertNotIn('collo_dyn_0', cnsrts)
+        self.assertEqual(cnsrts['collo_dyn'].getDim(), self.degree * prb.getState().getVars().shape[0])
+
+    def test_solution_unchanged(self):
+
+        prb = point_mass_problem()
+        Transcriptor.make_method('direct_collocation', prb, opts=dict(degree=self.degree))
+        slvr = Solver.make_solver('ipopt', prb, self.opts)
+        self.assertTrue(slvr.solve())
+        sol = slvr.getSolutionDict()
+
+        prb_ref = point_mass_problem()
+        per_point_collocation(prb_ref, self.degree)
+        slvr_ref = Solver.make_solver('ipopt', prb_ref, self.opts)
+        self.assertTrue(slvr_ref.solve())
+        sol_ref = slvr_ref.getSolutionDict()
+
+        for name in ['pos', 'vel', 'force'] + [f'collo_x_{i}' for i in range(self.degree)]:
+            np.testing.assert_allclose(sol[name], sol_ref[name], atol=1e-6)
+
+
+if __name__ == '__main__':
+    unittest.main()
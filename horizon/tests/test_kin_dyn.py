@@ -0,0 +1,75 @@
+import casadi as cs
+import numpy as np
+
+import unittest
+
+try:
+    from horizon.utils import kin_dyn
+except ModuleNotFoundError:  # kin_dyn requires casadi_kin_dyn
+    kin_dyn = None
+
+
+class KinDyn:
+    # analytic dynamics and contact jacobians of a 3-dof model
+    def __init__(self):
+        self.q = cs.SX.sym('q', 3)
+        self.v = cs.SX.sym('v', 3)
+        self.a = cs.SX.sym('a', 3)
+
+    def nv(self):
+        return 3
+
+    def rnea(self):
+        tau = cs.sin(self.q) * self.a + self.v ** 2 * cs.cos(self.q[0])
+        return cs.Function('rnea', [self.q, self.v, self.a], [tau], ['q', 'v', 'a'], ['tau']).serialize()
+
+    def jacobian(self, frame, ref_frame):
+        k = len(frame)
+        J = cs.vertcat(*[cs.horzcat(*[cs.sin(k * self.q[j] + i) for j in range(3)]) for i in range(6)])
+        return cs.Function('J', [self.q], [J], ['q'], ['J']).serialize()
+
+
+@unittest.skipIf(kin_dyn is None, 'casadi_kin_dyn not available')
+class TestInverseDynamicsMap(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.N = 5
+        self.kindyn = KinDyn()
+        self.frames = ['point_foot', 'surface_foot']
+
+        rng = np.random.default_rng(0)
+        self.q = rng.normal(size=(3, self.N))
+        self.v = rng.normal(size=(3, self.N))
+        self.a = rng.normal(size=(3, self.N))
+        self.wrenches = {'point_foot': rng.normal(size=(3, self.N)), 'surface_foot': rng.normal(size=(6, self.N))}
+
+    def test_wrench_contribution(self):
+
+        ID = kin_dyn.InverseDynamicsMap(self.N, self.kindyn, self.frames)
+        tau_free = ID.call(self.q, self.v, self.a).full()
+
+        for frame, wrench in self.wrenches.items():
+            with self.subTest(frame):
+                tau = ID.call(self.q, self.v, self.a, {frame: wrench}).full()
+
+                # a point contact acts on the linear rows of the jacobian, a surface contact on all of them
+                J = cs.Function.deserialize(self.kindyn.jacobian(frame, None))
+                JtF = np.column_stack([J(self.q[:, i]).full()[:wrench.shape[0]].T @ wrench[:, i] for i in range(self.N)])
+                np.testing.assert_allclose(tau_free - tau, JtF, rtol=1e-12, atol=1e-12)
+
+    def test_inverse_dynamics(self):
+        # the map gives the torques of InverseDynamics on each sample, also with threads
+        ID = kin_dyn.InverseDynamics(self.kindyn, self.frames)
+
+        for n_threads in [1, 2]:
+            with self.subTest(n_threads=n_threads):
+                ID_map = kin_dyn.InverseDynamicsMap(self.N, self.kindyn, self.frames, n_threads=n_threads)
+                tau = ID_map.call(self.q, self.v, self.a, self.wrenches).full()
+
+                for i in range(self.N):
+                    tau_i = ID.call(self.q[:, i], self.v[:, i], self.a[:, i], {frame: w[:, i] for frame, w in self.wrenches.items()})
+                    np.testing.assert_allclose(tau[:, i], tau_i.full().ravel(), rtol=1e-12, atol=1e-12)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,67 @@
+from horizon.problem import Problem
+from horizon import misc_function as misc
+import numpy as np
+
+import unittest
+
+
+def shift_bounds_per_node(var):
+    # reference: the previous RecedingVariable.shift, one setter for each bound
+    shifted_lb = misc.shift_array(var.getLowerBounds(), -1, -np.inf)
+    shifted_ub = misc.shift_array(var.getUpperBounds(), -1, np.inf)
+
+    var.setLowerBounds(shifted_lb)
+    var.setUpperBounds(shifted_ub)
+
+
+class TestRecedingShift(unittest.TestCase):
+
+    def setUp(self) -> None:
+        self.N = 6
+        self.rng = np.random.default_rng(0)
+
+    def make_variables(self):
+        prb = Problem(self.N, receding=True)
+        x = prb.createStateVariable('x', 3)
+        u = prb.createInputVariable('u', 2)
+        return x, u
+
+    def test_shift_bounds(self):
+
+        vars = self.make_variables()
+        vars_ref = self.make_variables()
+
+        # different bounds on each node, some of them infinite
+        for var, var_ref in zip(vars, vars_ref):
+            lb = -self.rng.uniform(1., 10., size=var.getLowerBounds().shape)
+            ub = self.rng.uniform(1., 10., size=var.getUpperBounds().shape)
+            lb[0, 1] = -np.inf
+            ub[-1, 2] = np.inf
+            var.setBounds(lb, ub)
+            var_ref.setBounds(lb, ub)
+
+        # shift more than once, so that the filled columns are shifted as well
+        for _ in range(3):
+            for var, var_ref in zip(vars, vars_ref):
+                var.shift()
+                shift_bounds_per_node(var_ref)
+
+                np.testing.assert_array_equal(var.getLowerBounds(), var_ref.getLowerBounds())
+                np.testing.assert_array_equal(var.getUpperBounds(), var_ref.getUpperBounds())
+
+    def test_shift_fills_last_node(self):
+
+        x, _ = self.make_variables()
+        lb = -np.arange(3 * (self.N + 1), dtype=float).reshape(3, self.N + 1)
+        x.setBounds(lb, -lb)
+
+        x.shift()
+
+        np.testing.assert_array_equal(x.getLowerBounds()[:, :-1], lb[:, 1:])
+        np.testing.assert_array_equal(x.getUpperBounds()[:, :-1], -lb[:, 1:])
+        self.assertTrue(np.all(x.getLowerBounds()[:, -1] == -np.inf))
+        self.assertTrue(np.all(x.getUpperBounds()[:, -1] == np.inf))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,168 @@
+from horizon.transcriptions import integrators
+import casadi as cs
+import numpy as np
+
+import unittest
+
+try:
+    from horizon.utils import resampler_trajectory
+except ModuleNotFoundError:  # the resampler requires casadi_kin_dyn
+    resampler_trajectory = None
+
+
+def schedule_per_step(node_time_array, dt, n_steps):
+    # reference: the node active at each step and its time, advanced by the step-by-step loop of the resampler
+    node_idx = np.zeros(n_steps, dtype=int)
+    t_steps = np.zeros(n_steps)
+    t = 0.
+    node = 0
+    for i in range(n_steps):
+        node_idx[i] = node
+        t_steps[i] = t
+        t += dt
+        if t > node_time_array[node + 1]:
+            node += 1
+
+    return node_idx, t_steps
+
+
+def second_order_integrator_per_step(p, v, u, node_time, dt, dae):
+    # reference: the integrator called once for each resampled step
+    node_time_array = resampler_trajectory._node_time_array(node_time, p.shape[1])
+    n_res = int(round(node_time_array[-1] / dt))
+    F_integrator = integrators.RK4(dae, cs.SX)
+    nq = p.shape[0]
+
+    x_res = np.zeros([p.shape[0] + v.shape[0], n_res + 1])
+    p_res = np.zeros([p.shape[0], n_res + 1])
+    v_res = np.zeros([v.shape[0], n_res + 1])
+    u_res = np.zeros([u.shape[0], n_res])
+    x_res[:, 0] = np.hstack((p[:, 0], v[:, 0]))
+    p_res[:, 0] = p[:, 0]
+    v_res[:, 0] = v[:, 0]
+    u_res[:, 0] = u[:, 0]
+
+    t = 0.
+    node = 0
+    for i in range(1, n_res):
+        x_resi = F_integrator(x0=x_res[:, i - 1], p=u[:, node], time=dt)['xf'].toarray().flatten()
+        x_res[:, i] = x_resi
+        u_res[:, i] = u[:, node]
+        t += dt
+
+        if t > node_time_array[node + 1]:
+            new_dt = t - node_time_array[node + 1]
+            node += 1
+            # the state is reset to the node, while p_res and v_res keep the integrated one if the step is not recomputed
+            x_res[:, i] = np.hstack((p[:, node], v[:, node]))
+            u_res[:, i] = u[:, node]
+            if new_dt >= 1e-6:
+                x_resi = F_integrator(x0=x_res[:, i], p=u[:, node], time=new_dt)['xf'].toarray().flatten()
+                x_res[:, i] = x_resi
+
+        p_res[:, i] = x_resi[:nq]
+        v_res[:, i] = x_resi[nq:]
+
+    p_res[:, -1] = p[:, -1]
+    v_res[:, -1] = v[:, -1]
+
+    return p_res, v_res, u_res
+
+
+def resampler_per_step(states, inputs, nodes_dt, desired_dt, dae):
+    # reference: the integrator called once for each resampled step
+    node_time_array = resampler_trajectory._node_time_array(nodes_dt, states.shape[1])
+    n_nodes_res = int(round(node_time_array[-1] / desired_dt)) + 1
+    F_integrator = integrators.RK4(dae, cs.SX)
+
+    state_res = np.zeros([states.shape[0], n_nodes_res])
+    state_res[:, 0] = states[:, 0]
+
+    t = 0.
+    node = 0
+    for i in range(1, n_nodes_res - 1):
+        state_res[:, i] = F_integrator(x0=state_res[:, i - 1], p=inputs[:, node], time=desired_dt)['xf'].toarray().flatten()
+        t += desired_dt
+
+        if t > node_time_array[node + 1]:
+            new_dt = t - node_time_array[node + 1]
+            node += 1
+            state_res[:, i] = states[:, node]
+            if new_dt >= 1e-6:
+                state_res[:, i] = F_integrator(x0=states[:, node], p=inputs[:, node], time=new_dt)['xf'].toarray().flatten()
+
+    state_res[:, -1] = states[:, -1]
+
+    return state_res
+
+
+@unittest.skipIf(resampler_trajectory is None, 'casadi_kin_dyn not available')
+class TestResampler(unittest.TestCase):
+
+    def setUp(self) -> None:
+        # pendulum-like double integrator, so that the integration depends on the state
+        q = cs.SX.sym('q', 2)
+        qdot = cs.SX.sym('qdot', 2)
+        qddot = cs.SX.sym('qddot', 2)
+        self.dae = {'x': cs.vertcat(q, qdot), 'p': qddot, 'ode': cs.vertcat(qdot, qddot - cs.sin(q)), 'quad': 0}
+
+        rng = np.random.default_rng(0)
+        self.n_nodes = 12
+        self.p = rng.normal(size=(2, self.n_nodes))
+        self.v = rng.normal(size=(2, self.n_nodes))
+        self.u = rng.normal(size=(2, self.n_nodes - 1))
+
+        # (node time, resampling dt)
+        self.cases = {
+            'uniform': (0.1, 0.01),
+            'non-uniform': (rng.uniform(0.05, 0.2, self.n_nodes - 1), 0.01),
+            'uneven final time': (np.full(self.n_nodes - 1, 0.1033), 0.02),
+            'dt larger than a node': (np.tile([0.02, 0.15], self.n_nodes)[:self.n_nodes - 1], 0.05),
+        }
+
+    def test_node_schedule(self):
+
+        for name, (node_time, dt) in self.cases.items():
+            with self.subTest(name):
+                node_time_array = resampler_trajectory._node_time_array(node_time, self.n_nodes)
+                n_steps = int(round(node_time_array[-1] / dt))
+
+                node_idx, t = resampler_trajectory._node_schedule(node_time_array, dt, n_steps)
+
+                node_idx_ref, t_ref = schedule_per_step(node_time_array, dt, n_steps)
+
+                np.testing.assert_array_equal(node_idx, node_idx_ref)
+                np.testing.assert_array_equal(t, t_ref)
+
+    def test_resample_input(self):
+
+        for name, (node_time, dt) in self.cases.items():
+            with self.subTest(name):
+                node_time_array = resampler_trajectory._node_time_array(node_time, self.n_nodes)
+                n_res = int(round(node_time_array[-1] / dt))
+
+                u_res = resampler_trajectory.resample_input(self.u, node_time, dt)
+
+                np.testing.assert_array_equal(u_res, self.u[:, schedule_per_step(node_time_array, dt, n_res)[0]])
+
+    def test_second_order_resample_integrator(self):
+
+        for name, (node_time, dt) in self.cases.items():
+            with self.subTest(name):
+                res = resampler_trajectory.second_order_resample_integrator(self.p, self.v, self.u, node_time, dt, self.dae)
+                res_ref = second_order_integrator_per_step(self.p, self.v, self.u, node_time, dt, self.dae)
+
+                for x, x_ref in zip(res, res_ref):
+                    np.testing.assert_array_equal(x, x_ref)
+
+    def test_resampler(self):
+
+        states = np.vstack((self.p, self.v))
+        for name, (node_time, dt) in self.cases.items():
+            with self.subTest(name):
+                state_res = resampler_trajectory.resampler(states, self.u, node_time, dt, self.dae)
+                np.testing.assert_array_equal(state_res, resampler_per_step(states, self.u, node_time, dt, self.dae))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -2,15 +2,63 @@ import casadi as cs
 import horizon.problem as prb
 from horizon.variables import AbstractVariable, SingleVariable, Variable, SingleParameter, Parameter
 import numpy as np
+from numpy.polynomial import polynomial as P
 from horizon.transcriptions.transcriptor import Transcriptor
 import horizon.transcriptions.integrators as integ
 
+def _collocation_coefficients(d, scheme='legendre'):
+    """
+    Compute the coefficients of the collocation scheme, from the Lagrange polynomials of degree d
+    built on the roots 0 + collocation points.
+
+    Args:
+        d (int): degree of approximating polynomial
+        scheme (str): collocation points, 'legendre' or 'radau'
+
+    Returns:
+        C: coefficients of the collocation equation (time derivative of the polynomials at the roots)
+        D: coefficients of the continuity equation (polynomials at the final time)
+        B: coefficients of the quadrature function (integral of the polynomials)
+    """
+    # generate coefficients from magic polynomial
+    collo_points = cs.collocation_points(d, scheme)
+
+    # roots of basis polynomials (0 + collocation points)
+    tau_root = np.append(0, collo_points)
+
+    # coefficients of the j-th Lagrange polynomial (column j, increasing powers),
+    # s.t. pj(tj) = 1 && pj(ti) = 0 if j != i
+    # note: these d+1 polynomials form a basis for all d-th degree polynomials
+    L = np.linalg.inv(P.polyvander(tau_root, d))
+
+    # coefficients of the collocation equation (i.e., dynamics): time derivative of the polynomials
+    # evaluated at all collocation points
+    # note: first row is not used (dynamics constraint at beginning of interval),
+    # as dynamics is only enforced at collocation points (excluding t = 0)
+    C = P.polyvander(tau_root, d - 1) @ P.polyder(L)
+
+    # coefficients of the continuity equation: polynomials evaluated at the final time
+    D = P.polyval(1.0, L)
+
+    # coefficients of the quadrature function: integral of the polynomials
+    B = P.polyval(1.0, P.polyint(L))
+
+    return C, D, B
+
+
 class DirectCollocation(Transcriptor):
     """
     Add auxiliary input variables and constraints that implement
     the Direct Collocation transcription scheme. This could also be
     seen as multiple shooting with a different integration strategy
     that is based on approximating polynomials.
+
+    Constraints added to the problem:
+        'collo_continuity': continuity of the state between consecutive intervals
+        'collo_dyn': dynamics at the collocation points, stacked point by point
+            (rows [i*nx, (i+1)*nx) belong to the i-th collocation point).
+            It replaces the former per-point constraints 'collo_dyn_0', ..., 'collo_dyn_{degree-1}':
+            code retrieving them by name (bounds, values, duals) must use 'collo_dyn' and slice it.
     """
 
     def __init__(self,
@@ -46,45 +94,8 @@ class DirectCollocation(Transcriptor):
         collo.insert(0, x)  # append state at beginning of interval
         collo_prev.insert(0, x_prev)  # append state at beginning of previous interval
 
-        # generate coefficients from magic polynomial
-        collo_points = cs.collocation_points(d, 'legendre')  # or 'radau'
-
-        # roots of basis polynomials (0 + collocation points)
-        tau_root = np.append(0, collo_points)
-
-        # coefficients of the collocation equation (i.e., dynamics)
-        # note: first row is not used (dynamics constraint at beginning of interval),
-        # as dynamics is only enforced at collocation points (excluding t = 0)
-        C = np.zeros((d + 1, d + 1))
-
-        # coefficients of the continuity equation
-        D = np.zeros(d + 1)
-
-        # coefficients of the quadrature function
-        B = np.zeros(d + 1)
-
-        # loop over polynomial basis
-        for j in range(d + 1):
-
-            # construct j-th Lagrange polynomial, s.t. pj(tj) = 1 && pj(ti) = 0 if j != i
-            # note: these d+1 polynomials form a basis for all d-th degree polynomials
-            p = np.poly1d([1])
-            for r in range(d + 1):
-                if r != j:
-                    p *= np.poly1d([1, -tau_root[r]]) / (tau_root[j] - tau_root[r])
-
-            # evaluate the polynomial at the final time to get the coefficients of the continuity equation
-            D[j] = p(1.0)
-
-            # evaluate the time derivative of the polynomial at all collocation points to get the coefficients
-            # of the collocation equation
-            pder = np.polyder(p)
-            for r in range(d + 1):
-                C[r, j] = pder(tau_root[r])  # note: r = 0 is actually not used!
-
-            # evaluate the integral of the polynomial to get the coefficients of the quadrature function
-            pint = np.polyint(p)
-            B[j] = pint(1.0)
+        # coefficients of the collocation, continuity and quadrature equations
+        C, D, B = _collocation_coefficients(d, 'legendre')  # or 'radau'
 
         # continuity constraint
         x_prev_int = 0  # this will be the previous state, integrated according to the previous polynomial
@@ -95,14 +106,18 @@ class DirectCollocation(Transcriptor):
 
         cc = prob.createConstraint('collo_continuity', x_prev_int - x, nodes=range(1, N + 1))
 
-        # dynamics constraint (one per collocation point)
+        # dynamics constraint: a single function stacking the residuals of all the collocation points,
+        # so that it is projected (and mapped) once over the nodes
+        collo_dyn = list()
         for i in range(d):
             # loop on collocation points
             xder = 0
             for j in range(d + 1):
                 # loop on basis polynomials
                 xder += C[i + 1, j] * collo[j]
-            dyn = prob.createConstraint(f'collo_dyn_{i}', xder - xdot * dt, nodes=range(N))
+            collo_dyn.append(xder - xdot * dt)
+
+        dyn = prob.createConstraint('collo_dyn', cs.vertcat(*collo_dyn), nodes=range(N))
 
 
 class MultipleShooting(Transcriptor):
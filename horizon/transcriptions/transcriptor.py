@@ -45,20 +45,11 @@ class Transcriptor(ABC):
         self.dt = prb.getDt()
 
         state_list = self.problem.getState()
-        state_prev_list = list()
-
-        for var in state_list:
-            state_prev_list.append(var.getVarOffset(-1))
-
         self.state = cs.vertcat(*state_list)
-        self.state_prev = cs.vertcat(*state_prev_list)
+        self.state_prev = cs.vertcat(*[var.getVarOffset(-1) for var in state_list])
 
         input_list = self.problem.getInput()
-        input_prev_list = list()
-        for var in input_list:
-            input_prev_list.append(var.getVarOffset(-1))
-
         self.input = cs.vertcat(*input_list)
-        self.input_prev = cs.vertcat(*input_prev_list)
+        self.input_prev = cs.vertcat(*[var.getVarOffset(-1) for var in input_list])
 
 
@@ -1,4 +1,3 @@
-import copy
 
 import numpy as np
 from casadi_kin_dyn import pycasadi_kin_dyn
@@ -16,11 +15,13 @@ from horizon.rhc.taskInterface import TaskInterface
 import rospy
 import os
 import subprocess
+import tempfile
+import argparse
 
 
 # barrier function
 def _barrier(x):
-    return cs.sum1(cs.if_else(x > 0, 0, x ** 2))
+    return cs.sum1((x <= 0) * x ** 2)
 
 
 def _trj(tau):
@@ -69,12 +70,15 @@ class ActionManager:
         self.contact_map = self.ti.model.fmap
 
         self.N = self.prb.getNNodes() - 1
+        # all the nodes of the horizon, shared (read-only) by the default contact of every frame
+        self._all_nodes = tuple(range(self.N + 1))
         # todo list of contact is fixed?
 
         self.constraints = list()
         self.current_cycle = 0  # what to do here?
 
-        self.contacts = self.contact_map.keys()
+        # frozen once: the contacts are indexed positionally by the step patterns
+        self.contacts = tuple(self.contact_map.keys())
         self.nc = len(self.contacts)
 
         self.kd = self.ti.kd
@@ -89,14 +93,16 @@ class ActionManager:
         self.default_foot_z = dict()
         for i, frame in enumerate(self.contacts):
             # fk functions and evaluated vars
-            fk = cs.Function.deserialize(self.ti.kd.fk(frame))
-            dfk = cs.Function.deserialize(self.ti.kd.frameVelocity(frame, self.ti.kd_frame))
+            fk = kin_dyn.fk_function(self.ti.kd, frame)
 
             # save foot height
-            self.default_foot_z[frame] = (fk(q=self.ti.q0)['ee_pos'][2]).toarray()
+            self.default_foot_z[frame] = float(fk(q=self.ti.q0)['ee_pos'][2])
 
         self.k0 = 0
 
+        # z trajectory over all the swing nodes of each step, with the parameters it was computed from
+        self._z_traj = dict()
+
         self.required_tasks = dict()
         self.required_tasks['foot_contact'] = {contact: self.ti.getTask(f"foot_contact_{contact}") for contact in self.contacts}
         self.required_tasks['foot_z'] = {contact: self.ti.getTask(f"foot_z_{contact}") for contact in self.contacts}
@@ -105,60 +111,56 @@ class ActionManager:
         self.task_type = self._check_required_tasks_type(['Cartesian', 'Contact'])
         self.init_constraints()
         self._set_default_action()
+        self._flush()
 
         self.action_list = []
 
     def compute_polynomial_trajectory(self, k_start, nodes, nodes_duration, p_start, p_goal, clearance, dim=None):
 
         if dim is None:
-            dim = [0, 1, 2]
+            # a slice (instead of a list of indices) takes a view of the positions, not a copy
+            dim = slice(0, 3)
 
         # todo check dimension of parameter before assigning it
 
-        traj_array = np.zeros(len(nodes))
-
-        start = p_start[dim]
-        goal = p_goal[dim]
+        start = np.asarray(p_start[dim], dtype=float)
+        goal = np.asarray(p_goal[dim], dtype=float)
 
-        index = 0
-        for k in nodes:
-            tau = (k - k_start) / nodes_duration
-            trj = _trj(tau) * clearance
-            trj += (1 - tau) * start + tau * goal
-            traj_array[index] = trj
-            index = index + 1
+        # evaluate the whole trajectory at once: one column for each node
+        tau = (np.asarray(nodes) - k_start) / nodes_duration
+        traj_array = np.multiply.outer(start, 1 - tau) + np.multiply.outer(goal, tau) + _trj(tau) * clearance
 
-        return np.array(traj_array)
+        return traj_array
 
     def _set_default_action(self):
         # todo for now the default is robot still, in contact
 
-        for frame, nodes in self.contact_constr_nodes.items():
-            self.contact_constr_nodes[frame] = list(range(self.N + 1))
-        for frame, nodes in self.z_constr_nodes.items():
+        # a single pass over the frames resets the nodes and the params, _flush() pushes them to the constraints
+        for frame in self.contacts:
+            self.contact_constr_nodes[frame] = self._all_nodes
             self.z_constr_nodes[frame] = []
-        for frame, nodes in self.foot_tgt_constr_nodes.items():
             self.foot_tgt_constr_nodes[frame] = []
 
-        for frame, param in self._foot_z_param.items():
-            self._foot_z_param[frame] = np.empty((1, self.N + 1))
-            self._foot_z_param[frame][:] = np.NaN
-
-        for frame, param in self._foot_tgt_params.items():
-            self._foot_tgt_params[frame] = np.empty((2, self.N + 1))
-            self._foot_tgt_params[frame][:] = np.NaN
+            self._foot_z_param[frame].fill(np.nan)
+            self._foot_tgt_params[frame].fill(np.nan)
 
-        # clearance nodes
-        for frame, z_constr in self.z_constr.items():
-            z_constr.setNodes(self.z_constr_nodes[frame])
+    def _flush(self, frames=None):
+        """
+        set the nodes (and the references) accumulated by the actions to the constraints, once for each frame
+        """
+        for frame in self.contacts if frames is None else frames:
+            # contact nodes
+            self.setContact(frame, self.contact_constr_nodes[frame])
 
-        # xy trajectory nodes
-        for frame, tgt_constr in self.foot_tgt_constr.items():
-            tgt_constr.setNodes(self.foot_tgt_constr_nodes[frame])
+            # xy trajectory nodes
+            if self.foot_tgt_constr_nodes[frame]:
+                self.foot_tgt_constr[frame].setRef(self._foot_tgt_params[frame][:, self.foot_tgt_constr_nodes[frame]])
+            self.foot_tgt_constr[frame].setNodes(self.foot_tgt_constr_nodes[frame])
 
-        # contact nodes
-        for frame, c_constr in self.contact_constr.items():
-            c_constr.setNodes(self.contact_constr_nodes[frame])
+            # clearance nodes
+            if self.z_constr_nodes[frame]:
+                self.z_constr[frame].setRef(self._foot_z_param[frame][:, self.z_constr_nodes[frame]])
+            self.z_constr[frame].setNodes(self.z_constr_nodes[frame])
 
     def _check_required_tasks_type(self, required_tasks):
         # actionManager requires some tasks for working. It asks the TaskInterface for tasks.
@@ -205,9 +207,10 @@ class ActionManager:
         self._foot_tgt_params = dict()
         self._foot_z_param = dict()
 
+        # one column per node, allocated once and reset in place by _set_default_action()
         for frame in self.contacts:
-            self._foot_tgt_params[frame] = None
-            self._foot_z_param[frame] = None
+            self._foot_tgt_params[frame] = np.empty((2, self.N + 1))
+            self._foot_z_param[frame] = np.empty((1, self.N + 1))
 
             # ==================================================================================
 
@@ -224,7 +227,8 @@ class ActionManager:
             self.z_constr[frame] = self.required_tasks['foot_z'][frame]
             self.foot_tgt_constr[frame] = self.required_tasks['foot_xy'][frame]
 
-            print(self.z_constr[frame])
+            if self.prb.debug_mode:
+                self.prb.logger.debug('foot z task of %s: %s', frame, self.z_constr[frame])
 
     def setContact(self, frame, nodes):
         """
@@ -239,87 +243,99 @@ class ActionManager:
         self.contact_constr[frame].setNodes(nodes)
 
     def _append_nodes(self, node_list, new_nodes):
+        # the list order is kept (it pairs nodes with the columns of the references), membership is checked on a set
+        present_nodes = set(node_list)
         for node in new_nodes:
-            if node not in node_list:
+            if node not in present_nodes:
+                present_nodes.add(node)
                 node_list.append(node)
 
         return node_list
 
-    def _append_params(self, params_array, new_params, nodes):
-
-        params_array[nodes] = np.append(params_array, new_params)
+    def setStep(self, step):
+        self.setSteps([step])
 
-        return params_array
+    def setSteps(self, steps):
+        """
+        add a batch of steps: the constraints of each involved frame are updated once, after all the steps
+        """
+        for step in steps:
+            self.action_list.append(step)
+            self._step(step)
 
-    def setStep(self, step):
-        self.action_list.append(step)
-        self._step(step)
+        self._flush(dict.fromkeys(step.frame for step in steps))
 
     def _step(self, step: Step):
         """
-        add step to horizon stack
+        add step to horizon stack (only the nodes and the params are updated, see _flush())
         """
-        s = copy.deepcopy(step)
         # todo temporary
 
         # todo how to define current cycle
-        frame = s.frame
-        k_start = s.k_start
-        k_goal = s.k_goal
-        all_contact_nodes = self.contact_constr_nodes[frame]
-        swing_nodes = list(range(k_start, k_goal))
-        stance_nodes = [k for k in all_contact_nodes if k not in swing_nodes]
-        n_swing = len(swing_nodes)
-
-        swing_nodes_in_horizon = [k for k in swing_nodes if k >= 0 and k <= self.N]
-        stance_nodes_in_horizon = [k for k in stance_nodes if k >= 0 and k <= self.N]
+        frame = step.frame
+        k_start = step.k_start
+        k_goal = step.k_goal
+        # swing nodes are contiguous: the ones in the horizon are just the interval clipped to [0, N]
+        k_start_in_horizon, k_goal_in_horizon = max(k_start, 0), min(k_goal, self.N + 1)
+        swing_nodes_in_horizon = range(k_start_in_horizon, k_goal_in_horizon)
         n_swing_in_horizon = len(swing_nodes_in_horizon)
 
-        # this step is outside the horizon!
+        # this step is outside the horizon! checked first, before any work on the nodes
         # todo what to do with default action?
 
         if n_swing_in_horizon == 0:
-            print(f'========= skipping step {s.frame}. Not in horizon: {swing_nodes_in_horizon} ==========')
+            if self.prb.debug_mode:
+                self.prb.logger.debug('========= skipping step %s. Not in horizon: %s ==========', step.frame, swing_nodes_in_horizon)
             return 0
-        print(f'========= activating step {s.frame}: {swing_nodes_in_horizon} ==========')
+
+        all_contact_nodes = np.asarray(self.contact_constr_nodes[frame], dtype=int)
+        swing_nodes = range(k_start, k_goal)
+        # the contact nodes outside the swing interval
+        stance_nodes = all_contact_nodes[(all_contact_nodes < k_start) | (all_contact_nodes >= k_goal)].tolist()
+        n_swing = len(swing_nodes)
+
+        if self.prb.debug_mode:
+            self.prb.logger.debug('========= activating step %s: %s ==========', step.frame, swing_nodes_in_horizon)
         # adding nodes to the current ones (if any)
         self.contact_constr_nodes[frame] = stance_nodes
-        self.foot_tgt_constr_nodes[frame] = self._append_nodes(self.foot_tgt_constr_nodes[frame], [k_goal])
         self.z_constr_nodes[frame] = self._append_nodes(self.z_constr_nodes[frame], swing_nodes_in_horizon)
 
         # break contact at swing nodes + z_trajectory + (optional) xy goal
-        # contact
-        self.setContact(frame, self.contact_constr_nodes[frame])
-
         # xy goal
         if self.N >= k_goal > 0 and step.goal.size > 0:
-            # adding param:
-            self._foot_tgt_params[frame][:, swing_nodes_in_horizon] = s.goal[:2]
-
-            self.foot_tgt_constr[frame].setRef(
-                self._foot_tgt_params[frame][self.foot_tgt_constr_nodes[frame]])  # s.goal[:2]
-            self.foot_tgt_constr[frame].setNodes(self.foot_tgt_constr_nodes[frame])  # [k_goal]
+            # adding param: one column per node, the xy goal is imposed on the touchdown node
+            self.foot_tgt_constr_nodes[frame] = self._append_nodes(self.foot_tgt_constr_nodes[frame], [k_goal])
+            self._foot_tgt_params[frame][:, k_goal] = step.goal[:2]
 
         # z goal
-        start = np.array([0, 0, self.default_foot_z[frame]]) if s.start.size == 0 else s.start
-        goal = np.array([0, 0, self.default_foot_z[frame]]) if s.goal.size == 0 else s.goal
-
-        z_traj = self.compute_polynomial_trajectory(k_start, swing_nodes_in_horizon, n_swing, start, goal, s.clearance,
-                                                    dim=2)
+        start = np.array([0, 0, self.default_foot_z[frame]]) if step.start.size == 0 else step.start
+        goal = np.array([0, 0, self.default_foot_z[frame]]) if step.goal.size == 0 else step.goal
+
+        # the trajectory depends only on the node relative to the beginning of the step:
+        # it is computed once over the whole swing and then sliced as the step recedes.
+        # It is kept with its parameters, so that an edited step (or a new one at the same address) is computed again
+        z_params = (n_swing, start[2], goal[2], step.clearance)
+        z_params_cached, z_traj_full = self._z_traj.get(id(step), (None, None))
+        if z_params_cached != z_params:
+            z_traj_full = self.compute_polynomial_trajectory(k_start, swing_nodes, n_swing, start, goal, step.clearance,
+                                                             dim=2)
+            self._z_traj[id(step)] = (z_params, z_traj_full)
+        # the swing window is contiguous: both the trajectory and the param are addressed with slices, not index arrays
+        z_traj = z_traj_full[k_start_in_horizon - k_start:k_goal_in_horizon - k_start]
         # adding param
-        self._foot_z_param[frame][:, swing_nodes_in_horizon] = z_traj[:len(swing_nodes_in_horizon)]
-        self.z_constr[frame].setRef(self._foot_z_param[frame][:, self.z_constr_nodes[frame]])  # z_traj
-        self.z_constr[frame].setNodes(self.z_constr_nodes[frame])  # swing_nodes_in_horizon
+        self._foot_z_param[frame][:, k_start_in_horizon:k_goal_in_horizon] = z_traj
 
     # todo unify the actions below, these are just different pattern of actions
     def _jump(self, nodes):
 
         # todo add parameters for step
+        step_list = list()
         for contact in self.contacts:
             k_start = nodes[0]
             k_end = nodes[-1]
-            s = Step(contact, k_start, k_end)
-            self.setStep(s)
+            step_list.append(Step(contact, k_start, k_end))
+
+        self.setSteps(step_list)
 
     def _walk(self, nodes, step_pattern=None, step_nodes_duration=None):
 
@@ -334,15 +350,15 @@ class ActionManager:
         pattern = step_pattern if step_pattern is not None else list(range(len(self.contacts)))
         # =========================================
         for n in range(n_step):
-            l = list(self.contacts)[pattern[n % len(pattern)]]
+            l = self.contacts[pattern[n % len(pattern)]]
             k_end_rounded = k_start + k_step_n
             s = Step(l, k_start, k_end_rounded)
-            print(l, k_start, k_end_rounded)
+            if self.prb.debug_mode:
+                self.prb.logger.debug('walk: step %s in [%s, %s)', l, k_start, k_end_rounded)
             k_start = k_end_rounded
             step_list.append(s)
 
-        for s_i in step_list:
-            self.setStep(s_i)
+        self.setSteps(step_list)
 
     def _trot(self, nodes):
 
@@ -367,8 +383,7 @@ class ActionManager:
             step_list.append(s1)
             step_list.append(s2)
 
-        for s_i in step_list:
-            am.setStep(s_i)
+        self.setSteps(step_list)
 
     def execute(self, solver):
         """
@@ -382,16 +397,17 @@ class ActionManager:
         for action in self.action_list:
             action.k_start = action.k_start - k0
             action.k_goal = action.k_goal - k0
-            action_nodes = list(range(action.k_start, action.k_goal))
-            action_nodes_in_horizon = [k for k in action_nodes if k >= 0]
             self._step(action)
 
+        # all the actions are collected: each constraint is updated once
+        self._flush()
+
         # for cnsrt_name, cnsrt in self.prb.getConstraints().items():
         #     print(cnsrt_name)
         #     print(cnsrt.getNodes().tolist())
-        # remove expired actions
-        self.action_list = [action for action in self.action_list if
-                            len([k for k in list(range(action.k_start, action.k_goal)) if k >= 0]) != 0]
+        # remove expired actions (the ones without nodes left in [0, k_goal))
+        self.action_list = [action for action in self.action_list if action.k_goal > max(action.k_start, 0)]
+        self._z_traj = {id(action): self._z_traj[id(action)] for action in self.action_list if id(action) in self._z_traj}
         # todo right now the non-active nodes of the parameter gets dirty,
         #  because .assing() only assign a value to the current nodes, the other are left with the old value
         #  better to reset?
@@ -401,21 +417,32 @@ class ActionManager:
         ## todo should implement --> removeNodes()
         ## todo should implement a function to reset to default values
 
+    @staticmethod
+    def _shift_guess(values, shift_num):
+        # shift the trajectory by shift_num nodes (as np.roll: back if negative, forward if positive),
+        # then repeat the last node on the last |shift_num| nodes
+        n_shift = abs(shift_num)
+        if n_shift == 0:
+            return values.copy()
+
+        shifted = np.empty_like(values)
+        if shift_num < 0:
+            shifted[:, :-n_shift] = values[:, n_shift:]
+        else:
+            shifted[:, n_shift:] = values[:, :-n_shift]
+            shifted[:, :n_shift] = values[:, -n_shift:]
+        shifted[:, -n_shift:] = values[:, -1:]
+        return shifted
+
     def _update_initial_state(self, solver: Solver, shift_num):
 
         x_opt = solver.getSolutionState()
         u_opt = solver.getSolutionInput()
 
-        xig = np.roll(x_opt, shift_num, axis=1)
-
-        for i in range(abs(shift_num)):
-            xig[:, -1 - i] = x_opt[:, -1]
+        xig = self._shift_guess(x_opt, shift_num)
         self.prb.getState().setInitialGuess(xig)
 
-        uig = np.roll(u_opt, shift_num, axis=1)
-
-        for i in range(abs(shift_num)):
-            uig[:, -1 - i] = u_opt[:, -1]
+        uig = self._shift_guess(u_opt, shift_num)
         self.prb.getInput().setInitialGuess(uig)
 
         self.prb.setInitialState(x0=xig[:, 0])
@@ -423,6 +450,11 @@ class ActionManager:
 
 if __name__ == '__main__':
 
+    parser = argparse.ArgumentParser(description='walking spot driven by the action manager')
+    parser.add_argument('--codegen_dir', help='folder of the generated and compiled solver code',
+                        default=os.path.join(tempfile.gettempdir(), 'action_manager'))
+    args = parser.parse_args()
+
     # set up problem
     ns = 50
     tf = 2.0  # 10s
@@ -478,7 +510,7 @@ if __name__ == '__main__':
     q0 = ti.q0
     v0 = ti.v0
 
-    f0 = np.array([0, 0, 55])
+    f0 = np.array([0., 0., 55.])
     nc = 4  # todo: only required for replay
 
     # final goal (a.k.a. integral velocity control)
@@ -520,8 +552,11 @@ if __name__ == '__main__':
 
     # ti.prb.createFinalConstraint('q_fb', q[:6] - q0[:6])
 
-    for f in forces:
-        ti.prb.createIntermediateResidual(f"min_{f.getName()}", 1e-2 * (f - f0))
+    # each force (or wrench, with zero torque) is regularized towards its own f0
+    forces_f0 = [np.pad(f0, (0, f.getDim() - f0.size)) for f in forces]
+
+    # a single stacked residual regularizes all the contact forces
+    ti.prb.createIntermediateResidual("min_forces", 1e-2 * (cs.vertcat(*forces) - np.concatenate(forces_f0)))
 
     for frame in contacts:
         subtask_force = {'type': 'Force',
@@ -594,8 +629,8 @@ if __name__ == '__main__':
 
     q.setInitialGuess(q0)
 
-    for f in forces:
-        f.setInitialGuess(f0)
+    for f, f_f0 in zip(forces, forces_f0):
+        f.setInitialGuess(f_f0)
 
     # k_start = 25
     # k_end = 36
@@ -648,27 +683,35 @@ if __name__ == '__main__':
     # create solver and solve initial seed
     # print('===========executing ...========================')
 
-    opts = {'ipopt.tol': 0.001,
-            'ipopt.constr_viol_tol': 1e-3,
-            'ipopt.max_iter': 1000,
-            'error_on_fail': True,
-            'ilqr.max_iter': 200,
-            'ilqr.alpha_min': 0.01,
-            'ilqr.use_filter': False,
-            'ilqr.hxx_reg': 0.0,
-            'ilqr.integrator': 'RK4',
-            'ilqr.merit_der_threshold': 1e-6,
-            'ilqr.step_length_threshold': 1e-9,
-            'ilqr.line_search_accept_ratio': 1e-4,
-            'ilqr.kkt_decomp_type': 'qr',
-            'ilqr.constr_decomp_type': 'qr',
-            'ilqr.verbose': True,
-            'ipopt.linear_solver': 'ma57',
-            }
-
-    opts_rti = opts.copy()
-    opts_rti['ilqr.enable_line_search'] = False
-    opts_rti['ilqr.max_iter'] = 4
+    # each solver gets only its own options: the ilqr generated code and the compiled nlp are kept in separate folders
+    if solver_type == 'ilqr':
+        opts = {'ilqr.max_iter': 200,
+                'ilqr.alpha_min': 0.01,
+                'ilqr.use_filter': False,
+                'ilqr.hxx_reg': 0.0,
+                'ilqr.integrator': 'RK4',
+                'ilqr.merit_der_threshold': 1e-6,
+                'ilqr.step_length_threshold': 1e-9,
+                'ilqr.line_search_accept_ratio': 1e-4,
+                'ilqr.kkt_decomp_type': 'qr',
+                'ilqr.constr_decomp_type': 'qr',
+                'ilqr.verbose': True,
+                'ilqr.codegen_enabled': True,
+                'ilqr.codegen_workdir': os.path.join(args.codegen_dir, 'ilqr'),
+                }
+
+        opts_rti = opts.copy()
+        opts_rti['ilqr.enable_line_search'] = False
+        opts_rti['ilqr.max_iter'] = 4
+    else:
+        opts = {'ipopt.tol': 0.001,
+                'ipopt.constr_viol_tol': 1e-3,
+                'ipopt.max_iter': 1000,
+                'ipopt.linear_solver': 'ma57',
+                'codegen_cache_dir': os.path.join(args.codegen_dir, 'nlp'),
+                }
+
+        opts_rti = opts.copy()
 
     solver_bs = Solver.make_solver(solver_type, ti.prb, opts)
     solver_rti = Solver.make_solver(solver_type, ti.prb, opts_rti)
@@ -740,27 +783,31 @@ if __name__ == '__main__':
     if plot:
         import matplotlib.pyplot as plt
 
+        # evaluate the feet trajectories once, both plots below use them
+        n_q_sol = solution['q'].shape[1]
+        fk_cache = {contact: kin_dyn.fk_function(ti.kd, contact).map(n_q_sol)
+                    for contact in contacts}
+        pos_cache = {contact: np.asarray(fk_cache[contact](q=solution['q'])['ee_pos']) for contact in contacts}
+
         plt.figure()
         for contact in contacts:
-            FK = cs.Function.deserialize(kd.fk(contact))
-            pos = FK(q=solution['q'])['ee_pos']
+            pos = pos_cache[contact]
 
             plt.title(f'feet position - plane_xy')
-            plt.plot(np.array(pos[0, :]).flatten(), np.array(pos[1, :]).flatten(), linewidth=2.5)
-            plt.scatter(np.array(pos[0, 0]), np.array(pos[1, 0]))
-            plt.scatter(np.array(pos[0, -1]), np.array(pos[1, -1]), marker='x')
+            plt.plot(pos[0], pos[1], linewidth=2.5)
+            plt.scatter(pos[0, 0], pos[1, 0])
+            plt.scatter(pos[0, -1], pos[1, -1], marker='x')
 
         plt.figure()
         for contact in contacts:
-            FK = cs.Function.deserialize(kd.fk(contact))
-            pos = FK(q=solution['q'])['ee_pos']
+            pos = pos_cache[contact]
 
             plt.title(f'feet position - plane_xz')
-            plt.plot(np.array(pos[0, :]).flatten(), np.array(pos[2, :]).flatten(), linewidth=2.5)
-            plt.scatter(np.array(pos[0, 0]), np.array(pos[2, 0]))
-            plt.scatter(np.array(pos[0, -1]), np.array(pos[2, -1]), marker='x')
+            plt.plot(pos[0], pos[2], linewidth=2.5)
+            plt.scatter(pos[0, 0], pos[2, 0])
+            plt.scatter(pos[0, -1], pos[2, -1], marker='x')
 
         hplt = plotter.PlotterHorizon(prb, solution)
         hplt.plotVariables([elem.getName() for elem in forces], show_bounds=True, gather=2, legend=False)
         hplt.plotVariables(['q'], show_bounds=True, gather=2, legend=False)
-        matplotlib.pyplot.show()
+        plt.show()
@@ -2,6 +2,60 @@ from casadi_kin_dyn import pycasadi_kin_dyn as cas_kin_dyn
 from horizon.utils import utils
 import casadi as cs
 import numpy as np
+import weakref
+
+# deserialized Functions of each kindyn object, released together with it
+_kindyn_functions = weakref.WeakKeyDictionary()
+
+def _cached_function(kindyn, key, serialized):
+    """
+    Returns the Function stored for kindyn under key, deserializing it on the first request
+    Args:
+        kindyn: casadi_kin_dyn object
+        key: hashable identifier of the Function
+        serialized: callable returning the serialized Function
+    Returns:
+        casadi Function
+    """
+    functions = _kindyn_functions.setdefault(kindyn, dict())
+    if key not in functions:
+        functions[key] = cs.Function.deserialize(serialized())
+    return functions[key]
+
+def fk_function(kindyn, frame):
+    """
+    Returns the forward kinematics Function of a frame, deserialized only once for each kindyn and frame
+    Args:
+        kindyn: casadi_kin_dyn object
+        frame: name of the frame
+    Returns:
+        fk: casadi Function (q) -> (ee_pos, ee_rot)
+    """
+    return _cached_function(kindyn, ('fk', frame), lambda: kindyn.fk(frame))
+
+def frame_velocity_function(kindyn, frame, ref_frame):
+    """
+    Returns the velocity Function of a frame, deserialized only once for each kindyn, frame and reference frame
+    Args:
+        kindyn: casadi_kin_dyn object
+        frame: name of the frame
+        ref_frame: reference frame of the velocity (e.g. LOCAL_WORLD_ALIGNED)
+    Returns:
+        dfk: casadi Function (q, qdot) -> (ee_vel_linear, ee_vel_angular)
+    """
+    return _cached_function(kindyn, ('frameVelocity', frame, ref_frame), lambda: kindyn.frameVelocity(frame, ref_frame))
+
+def frame_acceleration_function(kindyn, frame, ref_frame):
+    """
+    Returns the acceleration Function of a frame, deserialized only once for each kindyn, frame and reference frame
+    Args:
+        kindyn: casadi_kin_dyn object
+        frame: name of the frame
+        ref_frame: reference frame of the acceleration (e.g. LOCAL_WORLD_ALIGNED)
+    Returns:
+        ddfk: casadi Function (q, qdot) -> (ee_acc_linear, ee_acc_angular)
+    """
+    return _cached_function(kindyn, ('frameAcceleration', frame, ref_frame), lambda: kindyn.frameAcceleration(frame, ref_frame))
 
 def SRBD(m, I, f_dict, r, rddot, p_dict, w, wdot):
     """
@@ -263,33 +317,41 @@ class InverseDynamicsMap():
     given generalized position, velocities, accelerations and contact forces, returns generalized torques
     """
 
-    def __init__(self, N, kindyn, contact_frames=[], force_reference_frame=cas_kin_dyn.CasadiKinDyn.LOCAL):
+    def __init__(self, N, kindyn, contact_frames=[], force_reference_frame=cas_kin_dyn.CasadiKinDyn.LOCAL, n_threads=1):
         """
         Args:
+            N: number of samples the functions are mapped over
             kindyn: casadi_kin_dyn object
             contact_frames: list of contact frames
             force_reference_frame: this is the frame which is used to compute the Jacobian during the ID computation:
                 LOCAL (default)
                 WORLD
                 LOCAL_WORLD_ALIGNED
+            n_threads: number of threads evaluating the map (a serial map if 1)
         """
+        if n_threads > 1:
+            map_args = ('thread', n_threads)
+        else:
+            map_args = ('serial',)
+
         self.id = cs.Function.deserialize(kindyn.rnea())
-        self.id = self.id.map(N, 'thread', 15)
+        self.id = self.id.map(N, *map_args)
 
         J_point = cs.MX.sym('Jac', 3, kindyn.nv())
         w_point = cs.MX.sym('w', 3)
         self.JtF_fun_point = cs.Function('JtF_fun', [J_point, w_point], [cs.mtimes(J_point.T, w_point)])
-        self.JtF_fun_point = self.JtF_fun_point.map(N, 'thread', 15)
+        self.JtF_fun_point = self.JtF_fun_point.map(N, *map_args)
 
-        J_planar = cs.MX.sym('Jac', 3, kindyn.nv())
-        w_planar = cs.MX.sym('w', 3)
+        # surface contact: the full (linear and angular) jacobian and a 6D wrench
+        J_planar = cs.MX.sym('Jac', 6, kindyn.nv())
+        w_planar = cs.MX.sym('w', 6)
         self.JtF_fun_planar = cs.Function('JtF_fun', [J_planar, w_planar], [cs.mtimes(J_planar.T, w_planar)])
-        self.JtF_fun_planar = self.JtF_fun_planar.map(N, 'thread', 15)
+        self.JtF_fun_planar = self.JtF_fun_planar.map(N, *map_args)
 
         self.contact_jacobians = dict()
         for frame in contact_frames:
             self.contact_jacobians[frame] = cs.Function.deserialize(kindyn.jacobian(frame, force_reference_frame))
-            self.contact_jacobians[frame] = self.contact_jacobians[frame].map(N, 'thread', 15)
+            self.contact_jacobians[frame] = self.contact_jacobians[frame].map(N, *map_args)
 
     def call(self, q, qdot, qddot, frame_force_mapping = dict()):
         """
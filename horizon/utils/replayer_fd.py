@@ -178,7 +178,7 @@ if replay_traj:
 
 if plotting:
 
-    constraint_names = ['collo_x_0', 'collo_x_1', 'collo_x_2', 'collo_continuity', 'collo_dyn_0', 'collo_dyn_1', 'collo_dyn_2', 'final_velocity', 'lf_foot_vel', 'lf_foot_fc', 'lh_foot_vel', 'lh_foot_fc', 'rf_foot_vel', 'rf_foot_fc', 'rh_foot_vel', 'rh_foot_fc', 'constant_dt']
+    constraint_names = ['collo_x_0', 'collo_x_1', 'collo_x_2', 'collo_continuity', 'collo_dyn', 'final_velocity', 'lf_foot_vel', 'lf_foot_fc', 'lh_foot_vel', 'lh_foot_fc', 'rf_foot_vel', 'rf_foot_fc', 'rh_foot_vel', 'rh_foot_fc', 'constant_dt']
     plt.figure()
     for dim in range(solution['q'].shape[0]):
         plt.plot(range(solution['q'].shape[1]), np.array(solution['q'][dim, :]))
@@ -1,10 +1,62 @@
 from casadi_kin_dyn import pycasadi_kin_dyn as cas_kin_dyn
-from horizon.utils import kin_dyn
+from horizon.utils import kin_dyn, utils
 from horizon.transcriptions import integrators
 import numpy as np
 import casadi as cs
 
-def resample_torques(p, v, a, node_time, dt, dae, frame_force_mapping, kindyn, force_reference_frame = cas_kin_dyn.CasadiKinDyn.LOCAL):
+def _node_time_array(node_time, number_of_nodes):
+    """
+    Compute the time of each node, starting from zero.
+    Args:
+        node_time: duration of the intervals between the nodes, either a single value or one value for each interval
+        number_of_nodes: number of nodes
+    Returns:
+        node_time_array: time of each node
+    """
+    if hasattr(node_time, "__iter__"):
+        node_dt = np.asarray(node_time, dtype=float)[:number_of_nodes - 1]
+    else:
+        node_dt = np.full(number_of_nodes - 1, node_time, dtype=float)
+
+    return np.concatenate(([0.], np.cumsum(node_dt)))
+
+def _node_schedule(node_time_array, dt, n_steps):
+    """
+    Compute the node active at each resampled step.
+    The time is accumulated step by step and a node is left once the time goes beyond it:
+    the node advances at most once per step, even if a step spans more than one node.
+    Args:
+        node_time_array: time of each node
+        dt: resampling time
+        n_steps: number of resampled steps
+    Returns:
+        node_idx: node active at each step
+        t: time of each step
+    """
+    # cumsum adds sequentially, as t += dt
+    t = np.concatenate(([0.], np.cumsum(np.full(n_steps, dt))))[:n_steps]
+    # number of node times left behind at each step
+    crossed = np.searchsorted(node_time_array[1:], t, side='left')
+    # node[i] = min(node[i-1] + 1, crossed[i]), unrolled as a running minimum
+    node_idx = np.arange(n_steps) + np.minimum.accumulate(crossed - np.arange(n_steps))
+
+    return node_idx, t
+
+def _compile(fun, codegen_cache_dir):
+    """
+    Generate and compile a function to a shared library cached in a folder (see utils.compile_functions).
+    A later call with the same function loads the library without compiling it again.
+    Args:
+        fun: casadi Function to compile
+        codegen_cache_dir: folder where the compiled libraries are cached
+    Returns:
+        fun_compiled: the Function loaded from the shared library
+    """
+    lib_path = utils.compile_functions(fun.name(), fun.serialize(), lambda: [fun], codegen_cache_dir)
+
+    return cs.external(fun.name(), lib_path)
+
+def resample_torques(p, v, a, node_time, dt, dae, frame_force_mapping, kindyn, force_reference_frame = cas_kin_dyn.CasadiKinDyn.LOCAL, codegen_cache_dir=None, n_threads=1):
     """
         Resample solution to a different number of nodes, RK4 integrator is used for the resampling
         Args:
@@ -24,6 +76,8 @@ def resample_torques(p, v, a, node_time, dt, dae, frame_force_mapping, kindyn, f
                     LOCAL (default)
                     WORLD
                     LOCAL_WORLD_ALIGNED
+            codegen_cache_dir: if given, the integrator and the inverse dynamics are compiled to shared libraries cached in this folder
+            n_threads: number of threads evaluating the inverse dynamics on the samples (serially if 1)
 
         Returns:
             p_res: resampled p
@@ -32,23 +86,29 @@ def resample_torques(p, v, a, node_time, dt, dae, frame_force_mapping, kindyn, f
             frame_res_force_mapping: resampled frame_force_mapping
             tau_res: resampled tau
         """
-    p_res, v_res, a_res = second_order_resample_integrator(p, v, a, node_time, dt, dae)
+    p_res, v_res, a_res = second_order_resample_integrator(p, v, a, node_time, dt, dae, codegen_cache_dir)
 
     frame_res_force_mapping = dict()
 
-    for frame, wrench in frame_force_mapping.items():
-        frame_res_force_mapping[frame] = resample_input(wrench, node_time, dt)
-    tau_res = np.zeros(a_res.shape)
+    # all the wrenches share the same schedule: resample them stacked, in a single call
+    if frame_force_mapping:
+        wrench_res = resample_input(np.vstack(list(frame_force_mapping.values())), node_time, dt)
+        wrench_split = np.cumsum([wrench.shape[0] for wrench in frame_force_mapping.values()])[:-1]
+        frame_res_force_mapping = dict(zip(frame_force_mapping.keys(), np.split(wrench_res, wrench_split)))
 
-    ID = kin_dyn.InverseDynamics(kindyn, frame_force_mapping.keys(), force_reference_frame)
     ni = a_res.shape[1]
-    for i in range(ni):
-        frame_force_map_i = dict()
-        for frame, wrench in frame_res_force_mapping.items():
-            frame_force_map_i[frame] = wrench[:, i]
-        tau_i = ID.call(p_res[:, i], v_res[:, i], a_res[:, i], frame_force_map_i)
-        tau_res[:, i] = tau_i.toarray().flatten()
+    ID = kin_dyn.InverseDynamicsMap(ni, kindyn, frame_res_force_mapping.keys(), force_reference_frame, n_threads)
+
+    # build the inverse dynamics once as a function of (q, qdot, qddot, wrenches) on all the samples and evaluate it in a single call
+    q = cs.MX.sym('q', p_res.shape[0], ni)
+    qdot = cs.MX.sym('qdot', v_res.shape[0], ni)
+    qddot = cs.MX.sym('qddot', a_res.shape[0], ni)
+    frame_force_sym = {frame: cs.MX.sym(frame, wrench.shape[0], ni) for frame, wrench in frame_res_force_mapping.items()}
+    ID_fun = cs.Function('ID', [q, qdot, qddot, *frame_force_sym.values()], [ID.call(q, qdot, qddot, frame_force_sym)])
+    if codegen_cache_dir is not None:
+        ID_fun = _compile(ID_fun, codegen_cache_dir)
 
+    tau_res = ID_fun(p_res[:, 0:ni], v_res[:, 0:ni], a_res, *frame_res_force_mapping.values()).full()
 
     return p_res, v_res, a_res, frame_res_force_mapping, tau_res
 
@@ -64,32 +124,17 @@ def resample_input(input, node_time, dt):
         input_res: resampled input
     """
     number_of_nodes = input.shape[1]+1
-    node_time_array = np.zeros([number_of_nodes])
-    if hasattr(node_time, "__iter__"):
-        for i in range(1, number_of_nodes):
-            node_time_array[i] = node_time_array[i - 1] + node_time[i - 1]
-    else:
-        for i in range(1, number_of_nodes):
-            node_time_array[i] = node_time_array[i - 1] + node_time
+    node_time_array = _node_time_array(node_time, number_of_nodes)
 
     n_res = int(round(node_time_array[-1] / dt))
 
-    input_res = np.zeros([input.shape[0], n_res])
-
-    t = 0.
-    node = 0
-    i = 0
-    while i < input_res.shape[1]:
-        input_res[:, i] = input[:, node]
-        t += dt
-        i += 1
-        if t > node_time_array[node + 1]:
-            node += 1
+    node_idx, _ = _node_schedule(node_time_array, dt, n_res)
+    input_res = input[:, node_idx]
 
     return input_res
 
 
-def second_order_resample_integrator(p, v, u, node_time, dt, dae):
+def second_order_resample_integrator(p, v, u, node_time, dt, dae, codegen_cache_dir=None):
     """
     Resample a solution with the given dt (RK4 integrator is used internally)
     Args:
@@ -99,23 +144,20 @@ def second_order_resample_integrator(p, v, u, node_time, dt, dae):
         node_time: previous node time
         dt: resampling time
         dae: dynamic model
+        codegen_cache_dir: if given, the integrator is compiled to a shared library cached in this folder
     Returns:
         p_res: resampled position
         v_res: resampled velocity
         u_res: resampled input
     """
     number_of_nodes = p.shape[1]
-    node_time_array = np.zeros([number_of_nodes])
-    if hasattr(node_time, "__iter__"):
-        for i in range(1, number_of_nodes):
-            node_time_array[i] = node_time_array[i-1] + node_time[i - 1]
-    else:
-        for i in range(1, number_of_nodes):
-            node_time_array[i] = node_time_array[i-1] + node_time
+    node_time_array = _node_time_array(node_time, number_of_nodes)
 
     n_res = int(round(node_time_array[-1]/dt))
 
     F_integrator = integrators.RK4(dae, cs.SX)
+    if codegen_cache_dir is not None:
+        F_integrator = _compile(F_integrator, codegen_cache_dir)
 
     x_res0 = np.hstack((p[:, 0], v[:, 0]))
 
@@ -129,35 +171,43 @@ def second_order_resample_integrator(p, v, u, node_time, dt, dae):
     v_res[:, 0] = x_res0[p.shape[0]:]
     u_res[:, 0] = u[:, 0]
 
-    t = 0.
-    i = 0
-    node = 0
-    while i < u_res.shape[1]-1:
-        x_resi = F_integrator(x0=x_res[:, i], p=u[:, node], time=dt)['xf'].toarray().flatten()
+    # the state is reset at each step entering a new node: the steps in between share the same input and dt,
+    # and they are integrated in a single call, unrolling F_integrator over the whole segment
+    node_idx, t = _node_schedule(node_time_array, dt, u_res.shape[1])
+    segment_ends = np.union1d(np.flatnonzero(np.diff(node_idx)) + 1, u_res.shape[1] - 1)
+    F_segment = dict()
 
-        t += dt
-        i += 1
+    i_start = 0
+    for i in segment_ends[segment_ends > 0].tolist():
+        node = node_idx[i - 1]
+        is_boundary = node_idx[i] > node
 
-        #print(f"{t} <= {tf-dt} @ node time {(node+1)*node_time} i: {i}")
+        n_steps = i - i_start
+        if n_steps not in F_segment:
+            F_segment[n_steps] = F_integrator.mapaccum(n_steps)
+        x_seg = F_segment[n_steps](x0=x_res[:, i_start], p=u[:, node], time=dt)['xf'].full()
+        x_resi = x_seg[:, -1]
 
-        x_res[:, i] = x_resi
-        p_res[:, i] = x_resi[0:p.shape[0]]
-        v_res[:, i] = x_resi[p.shape[0]:]
-        u_res[:, i] = u[:, node]
+        x_res[:, i_start+1:i+1] = x_seg
+        p_res[:, i_start+1:i+1] = x_seg[0:p.shape[0]]
+        v_res[:, i_start+1:i+1] = x_seg[p.shape[0]:]
+        u_res[:, i_start+1:i+1] = u[:, node, None]
+        i_start = i
 
-        if t > node_time_array[node+1]:
-            new_dt = t - node_time_array[node+1]
+        if is_boundary:
+            new_dt = t[i] - node_time_array[node+1]
 
             # if t goes beyond the current node, first of all reset the state to the new one
             node += 1
-            x_res[:, i] = np.hstack((p[:, node], v[:, node]))
+            x_res[0:p.shape[0], i] = p[:, node]
+            x_res[p.shape[0]:, i] = v[:, node]
             p_res[:, i] = x_resi[0:p.shape[0]]
             v_res[:, i] = x_resi[p.shape[0]:]
             u_res[:, i] = u[:, node]
 
             # then, if the dt is big enough, recompute by using the new input starting from the state at the node
             if new_dt >= 1e-6:
-                x_resi = F_integrator(x0=x_res[:, i], p=u[:, node], time=new_dt)['xf'].toarray().flatten()
+                x_resi = F_integrator(x0=x_res[:, i], p=u[:, node], time=new_dt)['xf'].full().ravel()
 
                 x_res[:, i] = x_resi
                 p_res[:, i] = x_resi[0:p.shape[0]]
@@ -173,7 +223,7 @@ def second_order_resample_integrator(p, v, u, node_time, dt, dae):
     return p_res, v_res, u_res
 
 
-def resampler(state_vec, input_vec, nodes_dt, desired_dt, dae):
+def resampler(state_vec, input_vec, nodes_dt, desired_dt, dae, codegen_cache_dir=None):
 
     # convert to np if not np already
     states = np.array(state_vec)
@@ -183,16 +233,9 @@ def resampler(state_vec, input_vec, nodes_dt, desired_dt, dae):
     input_dim = inputs.shape[0]
     n_nodes = states.shape[1]
 
-    # construct array of times for each node (nodes could be of different time lenght)
-    node_time_array = np.zeros([n_nodes])
-    if hasattr(nodes_dt, "__iter__"):
-        # if a list of times is passed, construct from this list (used when variable time node)
-        for i in range(1, n_nodes):
-            node_time_array[i] = node_time_array[i - 1] + nodes_dt[i - 1]
-    else:
-        # if a number is passed, construct from this number (used when constant time node)
-        for i in range(1, n_nodes):
-            node_time_array[i] = node_time_array[i - 1] + nodes_dt
+    # construct array of times for each node (nodes could be of different time lenght):
+    # from a list of times (used when variable time node) or from a number (used when constant time node)
+    node_time_array = _node_time_array(nodes_dt, n_nodes)
 
 
     # number of nodes in resampled trajectory
@@ -204,6 +247,8 @@ def resampler(state_vec, input_vec, nodes_dt, desired_dt, dae):
     # L = 1
     # dae = {'x': state_abst, 'p': input_abst, 'ode': state_dot, 'quad': L}
     F_integrator = integrators.RK4(dae, cs.SX)
+    if codegen_cache_dir is not None:
+        F_integrator = _compile(F_integrator, codegen_cache_dir)
 
     # initialize resapmpled trajectories
     state_res = np.zeros([state_dim, n_nodes_res]) # state: number of resampled nodes
@@ -212,23 +257,28 @@ def resampler(state_vec, input_vec, nodes_dt, desired_dt, dae):
     state_res[:, 0] = states[:, 0]
     input_res[:, 0] = inputs[:, 0]
 
-    t = 0.
-    i = 0
-    node = 0
-    while i < input_res.shape[1] - 1:
-        # integrate the state using the input at the desired node
-        state_res_i = F_integrator(x0=state_res[:, i], p=inputs[:, node], time=desired_dt)['xf'].toarray().flatten()
+    # the steps between two resets of the state are integrated in a single call (see second_order_resample_integrator)
+    node_idx, t = _node_schedule(node_time_array, desired_dt, input_res.shape[1])
+    segment_ends = np.union1d(np.flatnonzero(np.diff(node_idx)) + 1, input_res.shape[1] - 1)
+    F_segment = dict()
 
-        t += desired_dt
-        i += 1
+    i_start = 0
+    for i in segment_ends[segment_ends > 0].tolist():
+        node = node_idx[i - 1]
+        is_boundary = node_idx[i] > node
 
-        state_res[:, i] = state_res_i
-        input_res[:, i] = inputs[:, node]
+        # integrate the state using the input at the desired node
+        n_steps = i - i_start
+        if n_steps not in F_segment:
+            F_segment[n_steps] = F_integrator.mapaccum(n_steps)
+        state_res[:, i_start+1:i+1] = F_segment[n_steps](x0=state_res[:, i_start], p=inputs[:, node], time=desired_dt)['xf'].full()
+        input_res[:, i_start+1:i+1] = inputs[:, node, None]
+        i_start = i
 
         # this is required if the current t goes beyond the current node time.
         # I get new_dt, the exceeding time (t-node_time_array[node+1]
-        if t > node_time_array[node + 1]:
-            new_dt = t - node_time_array[node + 1]
+        if is_boundary:
+            new_dt = t[i] - node_time_array[node + 1]
             node += 1
 
             state_res[:, i] = states[:, node]
@@ -237,7 +287,7 @@ def resampler(state_vec, input_vec, nodes_dt, desired_dt, dae):
                 # I set the new_dt as the integrator time
                 # integrate from the node i just exceed with the relative input for the exceeding time
                 state_res_i = F_integrator(x0=states[:, node], p=inputs[:, node], time=new_dt)[
-                    'xf'].toarray().flatten()
+                    'xf'].full().ravel()
                 state_res[:, i] = state_res_i
                 input_res[:, i] = inputs[:, node]
 
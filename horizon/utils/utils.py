@@ -1,5 +1,11 @@
 import casadi as cs
 from casadi_kin_dyn import pycasadi_kin_dyn as cas_kin_dyn
+from functools import lru_cache
+import hashlib
+import os
+import pathlib
+import subprocess
+import tempfile
 
 def jac(dict, var_string_list, function_string_list):
     """
@@ -161,5 +167,53 @@ def double_integrator(q, qdot, qddot):
     return x, xdot
 
 def barrier(x):
-    return cs.sum1(cs.if_else(x > 0, 0, x ** 2))
+    return cs.sum1((x <= 0) * x ** 2)
 
+
+@lru_cache(maxsize=8)
+def _kindyn_from_urdf(urdf_path, mtime):
+    return cas_kin_dyn.CasadiKinDyn(pathlib.Path(urdf_path).read_text())
+
+def kindyn_from_urdf(urdf_path):
+    """
+    Build a CasadiKinDyn from a urdf file, reusing the model already built for the same file
+    Args:
+        urdf_path: path to the urdf file
+
+    Returns:
+        kindyn: CasadiKinDyn of the model (rebuilt only if the file was modified in the meantime)
+    """
+    return _kindyn_from_urdf(os.path.abspath(urdf_path), os.path.getmtime(urdf_path))
+
+def compile_functions(name, key, functions, codegen_cache_dir):
+    """
+    Generate and compile casadi Functions to a shared library cached in a folder, named after the hash of a key.
+    The code is generated and compiled in a temporary folder inside the cache, then moved into it with an atomic rename:
+    the current working directory is never written, and a concurrent or failed build never leaves a broken library behind.
+    Args:
+        name: prefix of the library name
+        key: string identifying the functions (e.g. their serialization)
+        functions: callable returning the list of casadi Function to generate, called only if the library is not cached
+        codegen_cache_dir: folder where the compiled libraries are cached
+
+    Returns:
+        lib_path: path to the compiled library (compiled only if not already in the cache)
+    """
+    name = name + '_' + hashlib.sha1(key.encode()).hexdigest()
+    codegen_cache_dir = os.path.abspath(codegen_cache_dir)
+    lib_path = os.path.join(codegen_cache_dir, name + '.so')
+
+    if not os.path.exists(lib_path):
+        os.makedirs(codegen_cache_dir, exist_ok=True)
+        with tempfile.TemporaryDirectory(dir=codegen_cache_dir) as build_dir:
+            gen = cs.CodeGenerator(name + '.c')
+            for fun in functions():
+                gen.add(fun)
+            gen.generate(build_dir + os.sep)
+
+            # no -march=native: the cache key does not depend on the host, so the library must run on any machine sharing it
+            build_path = os.path.join(build_dir, name + '.so')
+            subprocess.run(['gcc', '-O3', '-shared', '-fPIC', os.path.join(build_dir, name + '.c'), '-o', build_path], check=True)
+            os.replace(build_path, lib_path)
+
+    return lib_path
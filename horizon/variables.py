@@ -1334,11 +1334,15 @@ class RecedingVariable(Variable):
         # shift bounds
         shift_num = -1
 
-        shifted_lb = misc.shift_array(self.getLowerBounds(), shift_num, -np.inf)
-        shifted_ub = misc.shift_array(self.getUpperBounds(), shift_num, np.inf)
-
-        self.setLowerBounds(shifted_lb)
-        self.setUpperBounds(shifted_ub)
+        # the getters return a copy of the bounds: shift them in place and set both at once
+        shifted_lb = self.getLowerBounds()
+        shifted_ub = self.getUpperBounds()
+        shifted_lb[:, :shift_num] = shifted_lb[:, -shift_num:]
+        shifted_lb[:, shift_num:] = -np.inf
+        shifted_ub[:, :shift_num] = shifted_ub[:, -shift_num:]
+        shifted_ub[:, shift_num:] = np.inf
+
+        self.setBounds(shifted_lb, shifted_ub)
 
         print(f'SHIFTED LB: {self.getLowerBounds()}')
         print(f'SHIFTED UB: {self.getUpperBounds()}')